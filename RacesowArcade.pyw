@@ -1,18 +1,36 @@
-import argparse, pygame, os
+import argparse, pygame, os, yaml
 from time import sleep
+from src import sounds
+from src.CompiledMap import CompiledMap
+from src.Game import Game
 from src.MainMenu import MainMenu
+from src.Replay import Replay
 from src.Settings import Settings
+from src.Simulation import Simulation
+from src.Texture import Texture
 from src.config import assets_folder
 
 #from profilehooks import profile
 #@profile
 def main(args):
     settings = Settings()
-    settings.load()
+    if not args.headless:
+        settings.load()
     for key, value in vars(args).items():
         if value is not None:
             settings.set(key, value)
 
+    if args.headless:
+        return simulate(args, settings)
+
+    if args.compile_map is not None:
+        return compile_map(args.compile_map, settings)
+
+    replay = None
+    if args.replay is not None:
+        replay = Replay(args.replay)
+        replay.apply_settings(settings)
+
     display_options = pygame.SCALED
     if args.fullscreen is not None:
         if args.fullscreen:
@@ -23,18 +41,25 @@ def main(args):
     pygame.init()
     pygame.mixer.init()
     pygame.mixer.set_num_channels(64)
+    sounds.load()
     pygame.display.set_caption("Racesow Arcade")
     pygame.mouse.set_visible(settings.cursor is None)
 
     screen = pygame.display.set_mode((settings.resolution[0], settings.resolution[1]), display_options)
     clock = pygame.time.Clock()
 
-    scene = MainMenu(screen, clock, settings)
+    if replay is not None:
+        scene = Game(replay.map_name, screen, clock, settings, replay)
+        if args.seek is not None:
+            replay.seek(scene, args.seek)
+    else:
+        scene = MainMenu(screen, clock, settings)
     while scene is not None:
         scene.init_input_mappings()
         scene = scene.game_loop()
 
-    settings.save()
+    if replay is None:
+        settings.save()
 
     back = pygame.mixer.Sound(os.path.join(assets_folder, 'sounds', 'menu', 'back.wav'))
     back.play()
@@ -43,6 +68,31 @@ def main(args):
     pygame.mixer.quit()
     pygame.quit()
 
+def simulate(args, settings):
+    replay = Replay(args.replay) if args.replay is not None else None
+    simulation = Simulation(args.map, settings, replay)
+    if replay is not None and args.seek is not None:
+        replay.seek(simulation.game, args.seek)
+    inputs = Simulation.load_inputs(args.inputs) if args.inputs is not None else []
+    result = simulation.run(inputs, args.ticks)
+    print(yaml.dump(result, default_flow_style=False, sort_keys=False), end='')
+
+def compile_map(map_name, settings):
+    pygame.init()
+    # textures can only be converted with a display mode, the window itself is not needed
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+
+    scale = settings.get_scale()
+    compiled = CompiledMap.compile(map_name, scale)
+    compiled.render_surfaces()
+    cache_file = CompiledMap.get_cache_file(map_name, scale)
+    compiled.write(cache_file)
+    print(f'Compiled {map_name} with {len(compiled.rects)} rectangles, {len(compiled.triangles)} triangles and {len(compiled.surfaces)} surfaces into {cache_file}')
+    stats = Texture.cache.get_stats()
+    print(f'Textures: {stats["images"]} images, {stats["surfaces"]} scaled surfaces ({stats["bytes"] / 1024 / 1024:.1f}MB), {stats["hits"]} reused')
+
+    pygame.quit()
+
 def parse_resolution(s):
     return [int(x) for x in s.split('x')]
 
@@ -70,6 +120,17 @@ if __name__ == '__main__':
     parser.add_argument('--volume', type=volume_type, default=None, help='Set game volume (1-10)')
     parser.add_argument('--music-enabled', type=str2bool, default=None, help='Enable or disable music')
     parser.add_argument('--music-volume', type=volume_type, default=None, help='Set music volume (1-10)')
+    parser.add_argument('--headless', action='store_true', help='Simulate a run without display and audio')
+    parser.add_argument('--map', type=str, default='egypt', help='Map to simulate in headless mode')
+    parser.add_argument('--inputs', type=str, default=None, help='Yaml file with scripted inputs for headless mode')
+    parser.add_argument('--ticks', type=int, default=100000, help='Max number of ticks to simulate in headless mode')
+    parser.add_argument('--record', type=str, default=None, help='Record the inputs of the played map into a replay file')
+    parser.add_argument('--replay', type=str, default=None, help='Play back a replay file')
+    parser.add_argument('--profile', action='store_true', help='Profile each frame, F3 toggles the overlay')
+    parser.add_argument('--profile-spike-ms', type=float, default=None, help='Dump the last frame timings to disk when a frame takes longer (default 20)')
+    parser.add_argument('--profile-log', type=str, default=None, help='Write the timings of every frame to this file as json lines')
+    parser.add_argument('--compile-map', type=str, default=None, help='Pre-render a map for the given resolution into the map cache')
+    parser.add_argument('--seek', type=int, default=None, help='Start the replay playback at this physics tick')
 
 
     main(parser.parse_args())
\ No newline at end of file
@@ -0,0 +1,73 @@
+import json, math, os, platform, subprocess, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# keep stdout machine readable
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+
+def get_commit():
+    """Returns the current git commit, marked with '-dirty' if there are local changes"""
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+        return f'{commit}-dirty' if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def get_environment():
+    import pygame
+    return {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+    }
+
+def percentile(values, p):
+    """Nearest rank percentile of a list of numbers"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def summarize(values, factor: float = 1.0, digits: int = 4):
+    """Returns mean, p50, p99 and max of a list of samples, multiplied by factor (e.g. 1000 for seconds to ms)"""
+    if not values:
+        return {'mean': 0, 'p50': 0, 'p99': 0, 'max': 0}
+    return {
+        'mean': round(sum(values) / len(values) * factor, digits),
+        'p50': round(percentile(values, 50) * factor, digits),
+        'p99': round(percentile(values, 99) * factor, digits),
+        'max': round(max(values) * factor, digits),
+    }
+
+def write_result(result, output: str = None):
+    """Writes the result as json to the output file, or to stdout"""
+    data = json.dumps(result, indent=2)
+    if output is None:
+        print(data)
+    else:
+        with open(output, 'w') as file:
+            file.write(data + '\n')
+
+def instrument(obj, name: str, timings: dict, calls: dict, key: str = None):
+    """Replaces a method of an object with a wrapper that adds up its inclusive run time and number of calls"""
+    method = getattr(obj, name)
+    key = key or name
+    perf_counter = time.perf_counter
+
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings[key] += perf_counter() - start
+            calls[key] += 1
+
+    setattr(obj, name, timed)
+
+def parse_resolution(s):
+    return [int(x) for x in s.split('x')]
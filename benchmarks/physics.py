@@ -0,0 +1,137 @@
+"""Physics benchmark: runs the headless simulation over a map with recorded input and reports
+ticks per second, per tick latency, the time spent in the player's movement and collision paths
+and the memory allocated per tick.
+
+    python benchmarks/physics.py
+    python benchmarks/physics.py --replay run.rsr --output physics.json
+"""
+import argparse, gc, os, time, tracemalloc
+from collections import defaultdict
+
+from common import ROOT, get_environment, instrument, parse_resolution, summarize, write_result
+
+from src.Replay import Replay
+from src.Settings import Settings
+from src.Simulation import Simulation
+
+# methods of the player and the map that are timed separately
+PLAYER_METHODS = ['movement', 'move_single_axis', 'collider_collisions', 'ramp_collisions', 'get_distance_to_collider_below']
+MAP_METHODS = ['update', 'update_active_objects', 'reset']
+
+
+def create_simulation(args):
+    settings = Settings()
+    settings.resolution = list(args.resolution)
+    replay = Replay(args.replay) if args.replay is not None else None
+    return Simulation(args.map, settings, replay)
+
+def run(simulation, args, on_step):
+    """Runs the simulation, calling on_step around each physics tick"""
+    step = simulation.step
+    simulation.step = lambda: on_step(step)
+    inputs = Simulation.load_inputs(args.inputs) if args.replay is None else []
+    simulation.run(inputs, args.ticks)
+
+def benchmark_ticks(args):
+    """Plain run without instrumentation, for throughput and per tick latency"""
+    simulation = create_simulation(args)
+    samples = []
+    perf_counter = time.perf_counter
+
+    def on_step(step):
+        start = perf_counter()
+        step()
+        samples.append(perf_counter() - start)
+
+    start = perf_counter()
+    run(simulation, args, on_step)
+    duration = perf_counter() - start
+
+    return simulation, {
+        'ticks': len(samples),
+        'ticks_per_second': round(len(samples) / duration, 1),
+        'tick_ms': summarize(samples, 1000),
+    }
+
+def benchmark_functions(args):
+    """Run with the hot paths wrapped, reports the inclusive time per tick spent in each of them"""
+    simulation = create_simulation(args)
+    game = simulation.game
+    timings = defaultdict(float)
+    calls = defaultdict(int)
+    for name in PLAYER_METHODS:
+        instrument(game.player, name, timings, calls)
+    for name in MAP_METHODS:
+        instrument(game.map, name, timings, calls)
+
+    samples = defaultdict(list)
+    def on_step(step):
+        timings.clear()
+        step()
+        for name in PLAYER_METHODS + MAP_METHODS:
+            samples[name].append(timings[name])
+
+    run(simulation, args, on_step)
+    ticks = max(1, game.tick)
+
+    functions = {}
+    for name in PLAYER_METHODS:
+        functions[f'Player.{name}'] = {'calls': calls[name], 'calls_per_tick': round(calls[name] / ticks, 2), 'ms': summarize(samples[name], 1000)}
+    for name in MAP_METHODS:
+        functions[f'Map.{name}'] = {'calls': calls[name], 'calls_per_tick': round(calls[name] / ticks, 2), 'ms': summarize(samples[name], 1000)}
+    return functions
+
+def benchmark_allocations(args):
+    """Run with tracemalloc, reports the memory allocated during each tick (including what is freed again
+    within the tick) and how often the garbage collector had to run"""
+    simulation = create_simulation(args)
+    samples = []
+
+    def on_step(step):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        step()
+        _, peak = tracemalloc.get_traced_memory()
+        samples.append(peak - current)
+
+    collections = sum(stats['collections'] for stats in gc.get_stats())
+    tracemalloc.start()
+    try:
+        run(simulation, args, on_step)
+    finally:
+        tracemalloc.stop()
+    collections = sum(stats['collections'] for stats in gc.get_stats()) - collections
+
+    return {
+        'bytes_per_tick': summarize(samples, digits=1),
+        'gc_collections_per_1000_ticks': round(collections / max(1, len(samples)) * 1000, 2),
+    }
+
+def main(args):
+    simulation, ticks = benchmark_ticks(args)
+    result = {
+        'benchmark': 'physics',
+        **get_environment(),
+        'map': simulation.map_name,
+        'input': os.path.relpath(args.replay or args.inputs, ROOT),
+        'resolution': args.resolution,
+        'scale': simulation.game.settings.get_scale(),
+        **ticks,
+        'functions': benchmark_functions(args),
+    }
+    if not args.skip_allocations:
+        result['allocations'] = benchmark_allocations(args)
+
+    write_result(result, args.output)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Racesow Arcade physics benchmark')
+    parser.add_argument('--map', type=str, default='egypt', help='Map to run on (ignored with --replay)')
+    parser.add_argument('--inputs', type=str, default=os.path.join(ROOT, 'benchmarks', 'inputs', 'egypt.yaml'), help='Yaml file with scripted inputs')
+    parser.add_argument('--replay', type=str, default=None, help='Replay file to use as input instead of the scripted inputs')
+    parser.add_argument('--ticks', type=int, default=10000, help='Max number of physics ticks to run')
+    parser.add_argument('--resolution', type=parse_resolution, default=[740, 400], help="Resolution in the format 'WxH', determines the scale")
+    parser.add_argument('--skip-allocations', action='store_true', help='Skip the (slow) allocation tracking run')
+    parser.add_argument('--output', type=str, default=None, help='Write the json result to this file instead of stdout')
+
+    main(parser.parse_args())
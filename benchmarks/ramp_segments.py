@@ -0,0 +1,134 @@
+"""Ramp segments benchmark: compares checking a rectangle against the top sides of many ramps in one NumPy
+batch (RampSegments) with checking them one by one (Rectangle.line_intersects_rectangle), on generated strip
+maps with the ramps of a map. It also checks that both find the same sides and exits with an error if they
+don't, as the shipped maps have too few ramps close together to ever run the batch.
+
+    python benchmarks/ramp_segments.py
+    python benchmarks/ramp_segments.py --counts 64 128 --output ramp_segments.json
+"""
+import argparse, random, sys, time
+
+from common import get_environment, parse_resolution, summarize, write_result
+
+from src.Collider import Collider
+from src.CompiledMap import CompiledMap
+from src.RampSegments import RampSegments
+from src.Rectangle import Rectangle
+from src.Settings import Settings
+from src.Triangle import Triangle
+from src.Vector2 import Vector2
+
+
+def generate_ramps(count: int, like: list[tuple], seed: int):
+    """Ramps with the shapes of the ramps of a map, next to each other along a strip, in load order"""
+    rng = random.Random(seed)
+    ramps = []
+    x = 0.0
+    for _ in range(count):
+        points = rng.choice(like)
+        min_x = min(points[0::2])
+        min_y = min(points[1::2])
+        triangle = Triangle(*(Vector2(px - min_x + x, py - min_y) for px, py in zip(points[0::2], points[1::2])))
+        ramps.append(Collider(triangle, 'ramp'))
+        # overlapping a bit, like ramps joined to a slope
+        x += (triangle.bbox[2] - triangle.bbox[0]) * rng.uniform(0.5, 1.0)
+    return ramps
+
+def generate_rectangles(ramps: list[Collider], size: float, count: int, seed: int):
+    """Rectangles around the top sides of the ramps, some of them with a corner or an edge exactly on an end
+    of a side, where the comparisons in the intersection test are on their boundary"""
+    rng = random.Random(seed)
+    sides = [side for ramp in ramps for side in ramp.shape.top_edges]
+    rectangles = []
+    for i in range(count):
+        side = rng.choice(sides)
+        point = side.p1 if rng.random() < 0.5 else side.p2
+        w = size * rng.uniform(0.5, 2)
+        h = size * rng.uniform(0.5, 2)
+        if i % 4 == 0:
+            x = point.x - rng.choice((0, w))
+            y = point.y - rng.choice((0, h))
+        else:
+            x = rng.uniform(point.x - w * 1.5, point.x + w * 0.5)
+            y = rng.uniform(point.y - h * 1.5, point.y + h * 0.5)
+        rectangles.append(Rectangle(Vector2(x, y), w, h))
+    return rectangles
+
+def check_one_by_one(rect: Rectangle, candidates: list[Collider]):
+    for collider in candidates:
+        for side in collider.shape.top_edges:
+            if rect.line_intersects_rectangle(side.p1, side.p2):
+                return side
+    return None
+
+def benchmark(ramps: list[Collider], rectangles: list[Rectangle], count: int):
+    """Checks each rectangle against the count ramps closest to it, returns the timings and the mismatches"""
+    ramp_segments = RampSegments(ramps)
+    perf_counter = time.perf_counter
+    batch_samples = []
+    single_samples = []
+    hits = 0
+    mismatches = 0
+    for rect in rectangles:
+        center = rect.pos.x + rect.w / 2
+        closest = sorted(range(len(ramps)), key=lambda i: abs((ramps[i].shape.bbox[0] + ramps[i].shape.bbox[2]) / 2 - center))[:count]
+        candidates = [ramps[i] for i in sorted(closest)]
+
+        start = perf_counter()
+        side = ramp_segments.check_rectangle(rect, candidates)
+        batch_samples.append(perf_counter() - start)
+        start = perf_counter()
+        expected = check_one_by_one(rect, candidates)
+        single_samples.append(perf_counter() - start)
+
+        # every side, not only the first hit
+        rows = [row for collider in candidates for row in ramp_segments.rows[collider]]
+        batch_hits = RampSegments.intersect(rect, ramp_segments.x1[rows], ramp_segments.y1[rows], ramp_segments.x2[rows], ramp_segments.y2[rows])
+        single_hits = [rect.line_intersects_rectangle(ramp_segments.sides[row][1].p1, ramp_segments.sides[row][1].p2) for row in rows]
+        if side is not expected or batch_hits.tolist() != single_hits:
+            mismatches += 1
+        hits += expected is not None
+
+    return {
+        'batched': count * 2 >= RampSegments.MIN_BATCH,
+        'batch_us': summarize(batch_samples, 1000000, 2),
+        'one_by_one_us': summarize(single_samples, 1000000, 2),
+        'hits': hits,
+        'mismatches': mismatches,
+    }
+
+def main(args):
+    settings = Settings()
+    settings.resolution = list(args.resolution)
+    scale = settings.get_scale()
+
+    compiled = CompiledMap.compile(args.map, scale)
+    ramps = generate_ramps(max(args.counts) * 4, compiled.triangles, args.seed)
+    rectangles = generate_rectangles(ramps, 40 * scale, args.rectangles, args.seed)
+    results = {count: benchmark(ramps, rectangles, count) for count in args.counts}
+
+    write_result({
+        'benchmark': 'ramp_segments',
+        **get_environment(),
+        'map': args.map,
+        'resolution': args.resolution,
+        'scale': scale,
+        'rectangles': args.rectangles,
+        'results': results,
+    }, args.output)
+
+    mismatches = sum(result['mismatches'] for result in results.values())
+    if mismatches:
+        sys.exit(f'{mismatches} rectangles where the batch and Rectangle.line_intersects_rectangle differ')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--map', type=str, default='egypt', help='Map whose ramps are used to generate the ramps')
+    parser.add_argument('--counts', type=int, nargs='+', default=[16, 32, 64, 128, 256], help='Numbers of candidate ramps checked per rectangle')
+    parser.add_argument('--rectangles', type=int, default=2000, help='Number of rectangles checked per count')
+    parser.add_argument('--resolution', type=parse_resolution, default=[740, 400], help="Resolution in the format 'WxH', sets the scale")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default=None, help='Write the json result to this file instead of stdout')
+
+    main(parser.parse_args())
@@ -0,0 +1,178 @@
+"""Render benchmark: replays a scripted run over a map and times each draw stage of the map, the player,
+the HUD and the main menu per frame, at several resolutions. Draws into an offscreen surface, so it
+also works without a display (using the dummy SDL drivers).
+
+The motion blur is also timed on its own with the most ghosts, against a baseline copying the sprite
+for every ghost like it did before.
+
+    python benchmarks/render.py
+    python benchmarks/render.py --resolutions 1920x1080 2560x1440 --frames 300
+"""
+import argparse, os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import time
+from collections import defaultdict
+
+from common import ROOT, get_environment, instrument, parse_resolution, summarize, write_result
+
+import pygame
+from src import config, sounds
+from src.Game import Game
+from src.MainMenu import MainMenu
+from src.Settings import Settings
+from src.Simulation import Simulation
+from src.Vector2 import Vector2
+
+# draw stages that are timed separately, Map.draw includes all other map stages
+MAP_STAGES = ['draw', 'draw_sky', 'draw_parallax_2', 'draw_parallax_1', 'draw_colliders', 'draw_entities', 'draw_decals', 'draw_projectiles', 'draw_front']
+PLAYER_STAGES = ['draw', 'motion_blur']
+HUD_STAGES = ['draw']
+
+
+def benchmark_game(args, resolution):
+    settings = Settings()
+    settings.resolution = list(resolution)
+    surface = pygame.Surface(resolution)
+    config.ticks = 0
+    config.rle_surfaces = not args.no_rle_surfaces
+    game = Game(args.map, surface, pygame.time.Clock(), settings)
+
+    timings = defaultdict(float)
+    calls = defaultdict(int)
+    for name in MAP_STAGES:
+        instrument(game.map, name, timings, calls, f'Map.{name}')
+    for name in PLAYER_STAGES:
+        instrument(game.player, name, timings, calls, f'Player.{name}')
+    for name in HUD_STAGES:
+        instrument(game.hud, name, timings, calls, f'HUD.{name}')
+
+    events = sorted(Simulation.load_inputs(args.inputs), key=lambda event: event['tick'])
+    next_event = 0
+    ticks_per_frame = max(1, args.frame_time // config.PHYSICS_TICK)
+
+    frames = []
+    samples = defaultdict(list)
+    perf_counter = time.perf_counter
+    for _ in range(args.frames):
+        # the camera follows the scripted run, the physics are not part of the measurement
+        for _ in range(ticks_per_frame):
+            while next_event < len(events) and events[next_event]['tick'] <= game.tick:
+                game.player_input(events[next_event]['input'], events[next_event]['pressed'])
+                next_event += 1
+            game.step()
+
+        config.delta_time = args.frame_time
+        timings.clear()
+        start = perf_counter()
+        game.draw()
+        frames.append(perf_counter() - start)
+        for key, value in timings.items():
+            samples[key].append(value)
+
+    stages = {key: summarize(samples[key] + [0] * (len(frames) - len(samples[key])), 1000) for key in sorted(samples)}
+    return summarize(frames, 1000), stages
+
+def motion_blur_copies(player, view_pos, sprite, blur_factor):
+    """Player.motion_blur as it was before, copying the sprite for every ghost"""
+    if player.num_boost_ghosts is not None:
+        player.boost_blur_elapsed += config.delta_time
+        duration = 420
+        remaining_time = max(0.0, duration - player.boost_blur_elapsed)
+        inverse_percentage = remaining_time / duration
+        for i in range(player.num_boost_ghosts):
+            ghost = sprite.copy()
+            alpha = 92 / (i + 1) * inverse_percentage
+            ghost.set_alpha(alpha)
+            player.game.surface.blit(ghost, (view_pos.x - i * blur_factor, view_pos.y))
+        if player.boost_blur_elapsed >= duration:
+            player.num_boost_ghosts = None
+            player.boost_blur_elapsed = 0
+
+def benchmark_motion_blur(args, resolution):
+    """Times the motion blur of the player with the most ghosts (11) per frame, returns the summaries of
+    Player.motion_blur and of the copying baseline"""
+    settings = Settings()
+    settings.resolution = list(resolution)
+    game = Game(args.map, pygame.Surface(resolution), pygame.time.Clock(), settings)
+    player = game.player
+    sprite = player.animation.current_sprite
+    view_pos = Vector2(resolution[0] / 2, resolution[1] / 2)
+    blur_factor = 256 / 64 * settings.get_scale()
+    config.delta_time = args.frame_time
+
+    results = {}
+    perf_counter = time.perf_counter
+    for name, motion_blur in (('pooled', player.motion_blur), ('copies', lambda *args: motion_blur_copies(player, *args))):
+        samples = []
+        for _ in range(args.frames):
+            player.num_boost_ghosts = 11
+            player.boost_blur_elapsed = 0.0
+            start = perf_counter()
+            motion_blur(view_pos, sprite, blur_factor)
+            samples.append(perf_counter() - start)
+        results[name] = summarize(samples, 1000)
+    results['delta_mean'] = round(results['copies']['mean'] - results['pooled']['mean'], 4)
+    return results
+
+def benchmark_menu(args, resolution):
+    settings = Settings()
+    settings.resolution = list(resolution)
+    menu = MainMenu(pygame.Surface(resolution), pygame.time.Clock(), settings)
+
+    samples = []
+    perf_counter = time.perf_counter
+    for _ in range(args.frames):
+        start = perf_counter()
+        menu.draw()
+        samples.append(perf_counter() - start)
+
+    return summarize(samples, 1000)
+
+def main(args):
+    pygame.init()
+    pygame.mixer.init()
+    sounds.load()
+    # images can only be converted once a display mode is set, the benchmark itself draws offscreen
+    pygame.display.set_mode((1, 1))
+
+    resolutions = {}
+    for resolution in args.resolutions:
+        settings = Settings()
+        settings.resolution = list(resolution)
+        frame_ms, stages = benchmark_game(args, resolution)
+        stages['MainMenu.draw'] = benchmark_menu(args, resolution)
+        resolutions[f'{resolution[0]}x{resolution[1]}'] = {
+            'scale': settings.get_scale(),
+            'frame_ms': frame_ms,
+            'stages_ms': stages,
+            'motion_blur_ms': benchmark_motion_blur(args, resolution),
+        }
+
+    pygame.quit()
+
+    write_result({
+        'benchmark': 'render',
+        **get_environment(),
+        'video_driver': os.environ['SDL_VIDEODRIVER'],
+        'map': args.map,
+        'input': os.path.relpath(args.inputs, ROOT),
+        'frames': args.frames,
+        'frame_time': args.frame_time,
+        'rle_surfaces': not args.no_rle_surfaces,
+        'resolutions': resolutions,
+    }, args.output)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Racesow Arcade render benchmark')
+    parser.add_argument('--map', type=str, default='egypt', help='Map to render')
+    parser.add_argument('--inputs', type=str, default=os.path.join(ROOT, 'benchmarks', 'inputs', 'egypt.yaml'), help='Yaml file with the scripted run the camera follows')
+    parser.add_argument('--frames', type=int, default=600, help='Number of frames to render per resolution')
+    parser.add_argument('--frame-time', type=int, default=16, help='Game time in ms between two rendered frames')
+    parser.add_argument('--resolutions', type=parse_resolution, nargs='+', default=[[740, 400], [1280, 720], [1920, 1080], [2560, 1440]], help="Resolutions in the format 'WxH'")
+    parser.add_argument('--no-rle-surfaces', action='store_true', help='Blit the collider surfaces as they are instead of RLE accelerated')
+    parser.add_argument('--output', type=str, default=None, help='Write the json result to this file instead of stdout')
+
+    main(parser.parse_args())
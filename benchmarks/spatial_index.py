@@ -0,0 +1,115 @@
+"""Spatial index benchmark: compares the query cost of the spatial index backends on the colliders of a
+map and on generated strip maps with an increasing number of colliders.
+
+    python benchmarks/spatial_index.py
+    python benchmarks/spatial_index.py --counts 1000 10000 100000 --output spatial_index.json
+"""
+import argparse, random, time
+
+from common import get_environment, parse_resolution, summarize, write_result
+
+from src.CompiledMap import CompiledMap
+from src.Map import Map, create_spatial_index
+from src.Settings import Settings
+
+BACKENDS = ['quadtree', 'strip']
+
+
+def get_map_bboxes(map_name: str, scale: float):
+    compiled = CompiledMap.compile(map_name, scale)
+    bboxes = [(x, y, x + w, y + h) for x, y, w, h in compiled.rects]
+    for x1, y1, x2, y2, x3, y3 in compiled.triangles:
+        bboxes.append((min(x1, x2, x3), min(y1, y2, y3), max(x1, x2, x3), max(y1, y2, y3)))
+    return compiled.bbox, bboxes
+
+def generate_bboxes(count: int, like: list[tuple], seed: int):
+    """Strip map with the given number of colliders, with the sizes and the density along x of the real map"""
+    rng = random.Random(seed)
+    min_y = min(bbox[1] for bbox in like)
+    max_y = max(bbox[3] for bbox in like)
+    density = len(like) / (max(bbox[2] for bbox in like) - min(bbox[0] for bbox in like))
+    length = count / density
+
+    sizes = [(bbox[2] - bbox[0], bbox[3] - bbox[1]) for bbox in like]
+    bboxes = []
+    for _ in range(count):
+        w, h = rng.choice(sizes)
+        x = rng.uniform(0, length)
+        y = rng.uniform(min_y, max_y)
+        bboxes.append((x, y, x + w, y + h))
+    bbox = (0, min_y, length + max(bbox[2] - bbox[0] for bbox in bboxes), max_y + max(bbox[3] - bbox[1] for bbox in bboxes))
+    return bbox, bboxes
+
+def generate_queries(bbox: tuple, width: float, height: float, count: int, seed: int):
+    """Queries of the given size, following a camera moving along the map"""
+    rng = random.Random(seed)
+    queries = []
+    for i in range(count):
+        x = bbox[0] + (bbox[2] - bbox[0] - width) * i / count
+        y = rng.uniform(bbox[1], max(bbox[1], bbox[3] - height))
+        queries.append((x, y, x + width, y + height))
+    return queries
+
+def benchmark_backend(name: str, bbox: tuple, bboxes: list[tuple], queries: dict[str, list[tuple]], scale: float):
+    perf_counter = time.perf_counter
+    start = perf_counter()
+    index = create_spatial_index(name, bbox, scale)
+    for i, item_bbox in enumerate(bboxes):
+        index.insert(i, item_bbox)
+    # the first query finishes building the strip index
+    index.intersect(bbox)
+    result = {'build_ms': round((perf_counter() - start) * 1000, 2)}
+
+    for kind, kind_queries in queries.items():
+        samples = []
+        results = 0
+        for query in kind_queries:
+            start = perf_counter()
+            found = index.intersect(query)
+            samples.append(perf_counter() - start)
+            results += len(found)
+        result[kind] = {'us': summarize(samples, 1000000, 2), 'results': round(results / len(kind_queries), 1)}
+    return result
+
+def benchmark(bbox: tuple, bboxes: list[tuple], args, scale: float):
+    width, height = args.resolution
+    queries = {
+        # the view of the camera
+        'view': generate_queries(bbox, width, height, args.queries, args.seed),
+        # a strip entering the window of ActiveSet when the camera moves sideways
+        'active_strip': generate_queries(bbox, Map.ACTIVE_CELL_SIZE * scale, height * 42, args.queries, args.seed),
+    }
+    return {'colliders': len(bboxes), 'backends': {name: benchmark_backend(name, bbox, bboxes, queries, scale) for name in BACKENDS}}
+
+def main(args):
+    settings = Settings()
+    settings.resolution = list(args.resolution)
+    scale = settings.get_scale()
+
+    map_bbox, map_bboxes = get_map_bboxes(args.map, scale)
+    results = {args.map: benchmark(map_bbox, map_bboxes, args, scale)}
+    for count in args.counts:
+        bbox, bboxes = generate_bboxes(count, map_bboxes, args.seed)
+        results[f'generated-{count}'] = benchmark(bbox, bboxes, args, scale)
+
+    write_result({
+        'benchmark': 'spatial_index',
+        **get_environment(),
+        'map': args.map,
+        'resolution': args.resolution,
+        'scale': scale,
+        'queries': args.queries,
+        'results': results,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--map', type=str, default='egypt', help='Map whose colliders are benchmarked and used as a model for the generated maps')
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000, 5000, 20000], help='Number of colliders of the generated maps')
+    parser.add_argument('--queries', type=int, default=2000, help='Number of queries of each kind')
+    parser.add_argument('--resolution', type=parse_resolution, default=[740, 400], help="Resolution in the format 'WxH', sets the scale and the query sizes")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default=None, help='Write the json result to this file instead of stdout')
+
+    main(parser.parse_args())
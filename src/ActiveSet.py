@@ -0,0 +1,117 @@
+import bisect, math
+
+from src.SpatialIndex import SpatialIndex
+
+
+class ActiveSet:
+    """Keeps the map objects within a window around the camera sorted into buckets (e.g. static colliders,
+    items), which the player and projectiles check against.
+
+    The window is snapped to a grid of cells, so the buckets only change when the camera crosses a cell
+    boundary. Then only the strips of cells which entered or left the window are queried from the spatial
+    index and the objects in them are added to or removed from the buckets. The buckets are updated in place
+    and keep the load order of the objects, no matter in which order they entered the window."""
+
+    def __init__(self, index: SpatialIndex, bucket_names: list[str], cell_size: float):
+        self.index = index
+        self.cell_size = cell_size
+
+        # the lists are kept for the lifetime of the map, so they can be referenced directly
+        self.buckets: dict[str, list] = {name: [] for name in bucket_names}
+        self.bucket_of = {}
+        self.bboxes = {}
+        self.ranks = {}
+
+        self.active = set()
+        self.window: tuple|None = None
+        # changes whenever the buckets change
+        self.version = 0
+        self.rebuilds = 0
+        self.updates = 0
+
+    def insert(self, object, bbox: tuple, bucket_name: str):
+        self.index.insert(object, bbox)
+        self.bucket_of[object] = self.buckets[bucket_name]
+        self.bboxes[object] = bbox
+        self.ranks[object] = len(self.ranks)
+
+    def get_window(self, x1: float, y1: float, x2: float, y2: float):
+        """Returns the area snapped to the cells it touches"""
+        size = self.cell_size
+        return math.floor(x1 / size) * size, math.floor(y1 / size) * size, (math.floor(x2 / size) + 1) * size, (math.floor(y2 / size) + 1) * size
+
+    def update(self, x1: float, y1: float, x2: float, y2: float):
+        """Updates the buckets to the objects intersecting the area (snapped to cells).
+        Returns True if the buckets changed."""
+        window = self.get_window(x1, y1, x2, y2)
+        if window == self.window:
+            return False
+
+        previous = self.window
+        self.window = window
+        self.version += 1
+        if previous is None or not self.intersects(previous, window):
+            self.rebuild()
+            return True
+
+        self.updates += 1
+        added = []
+        for strip in self.subtract(window, previous):
+            for object in self.index.intersect(strip):
+                if object not in self.active:
+                    self.active.add(object)
+                    added.append(object)
+
+        removed = set()
+        for strip in self.subtract(previous, window):
+            for object in self.index.intersect(strip):
+                if object in self.active and not self.intersects(self.bboxes[object], window):
+                    self.active.discard(object)
+                    removed.add(object)
+
+        if removed:
+            for bucket in {id(self.bucket_of[object]): self.bucket_of[object] for object in removed}.values():
+                bucket[:] = [object for object in bucket if object not in removed]
+
+        for object in added:
+            bisect.insort(self.bucket_of[object], object, key=self.ranks.__getitem__)
+
+        return True
+
+    def rebuild(self):
+        """Fills the buckets from a query of the whole window"""
+        self.rebuilds += 1
+        for bucket in self.buckets.values():
+            bucket.clear()
+
+        self.active = set(self.index.intersect(self.window))
+        for object in sorted(self.active, key=self.ranks.__getitem__):
+            self.bucket_of[object].append(object)
+
+    def invalidate(self):
+        """Empties the buckets, the next update fills them again"""
+        self.window = None
+        self.version += 1
+        self.active = set()
+        for bucket in self.buckets.values():
+            bucket.clear()
+
+    @staticmethod
+    def intersects(a: tuple, b: tuple):
+        # inclusive, like the spatial index query
+        return a[2] >= b[0] and a[0] <= b[2] and a[3] >= b[1] and a[1] <= b[3]
+
+    @staticmethod
+    def subtract(a: tuple, b: tuple):
+        """Returns the strips of a which are not covered by b"""
+        strips = []
+        if a[0] < b[0]:
+            strips.append((a[0], a[1], b[0], a[3]))
+        if a[2] > b[2]:
+            strips.append((b[2], a[1], a[2], a[3]))
+        x1, x2 = max(a[0], b[0]), min(a[2], b[2])
+        if a[1] < b[1]:
+            strips.append((x1, a[1], x2, b[1]))
+        if a[3] > b[3]:
+            strips.append((x1, b[3], x2, a[3]))
+        return strips
@@ -1,9 +1,7 @@
-import os, pygame
-
-from PIL.ImImagePlugin import FRAMES
-from pygame.examples.headless_no_windows_needed import scaleit
+import os
 
 from src import config
+from src.AnimationAtlas import AnimationAtlas
 
 class Animation:
     """Contains specific animation variables and functions for this class"""
@@ -89,27 +87,21 @@ class Animation:
             ],
         }
 
-
-        sprite_sheet = pygame.image.load(os.path.join(config.assets_folder, 'graphics', 'player.png'))
-        new_size = (sprite_sheet.get_width() * player.P_SCALE, sprite_sheet.get_height() * player.P_SCALE)
-        self.sprite_sheet = pygame.transform.smoothscale(sprite_sheet, new_size).convert_alpha()
-
-        game_scale = player.game.settings.get_scale()
-        self.frames = {}
-        self.frames_left = {}
-        for anim, frames in SPRITES.items():
-            if isinstance(frames, tuple):
-                new_frame = self.sprite_sheet.subsurface(frames).copy()
-                self.frames[anim] = pygame.transform.scale(new_frame, (new_frame.get_width() * game_scale, new_frame.get_height() * game_scale))
-                self.frames_left[anim] = pygame.transform.flip(self.frames[anim], True, False)
-            elif isinstance(frames, list):
-                self.frames[anim] = []
-                self.frames_left[anim] = []
-                for frame in frames:
-                    new_frame = self.sprite_sheet.subsurface(frame).copy()
-                    scaled_frame = pygame.transform.scale(new_frame, (new_frame.get_width() * game_scale, new_frame.get_height() * game_scale))
-                    self.frames[anim].append(scaled_frame)
-                    self.frames_left[anim].append(pygame.transform.flip(scaled_frame, True, False))
+        # the frames are shared by all animations through the atlas, so creating an animation (on every
+        # respawn) doesn't cut and scale the sprite sheet again
+        self.atlas = None
+        if config.headless:
+            # keep the frame layout for the animation state, but without any surfaces
+            self.frames = {anim: [None] * len(frames) if isinstance(frames, list) else None for anim, frames in SPRITES.items()}
+            self.frames_left = self.frames
+            self.frame_keys = {}
+        else:
+            sheet_path = os.path.join(config.assets_folder, 'graphics', 'player.png')
+            self.atlas = AnimationAtlas.get(sheet_path, SPRITES, player.P_SCALE, player.game.settings.get_scale())
+            self.frames = self.atlas.frames
+            self.frames_left = self.atlas.frames_left
+            # keys of the frames which stay the same when the animation is created again (see RotationCache)
+            self.frame_keys = self.atlas.frame_keys
 
         self.player = player
         self.end_frame = 11
@@ -168,6 +160,11 @@ class Animation:
         else:
             return self.frames_left[self.active_idle_anim]
 
+    def get_ramp_frames(self):
+        """Returns (key, frame) pairs of the frames mostly seen on ramps, the run animation of the active weapon"""
+        frames = self.frames[self.active_run_anim] + self.frames_left[self.active_run_anim]
+        return [(self.frame_keys[frame], frame) for frame in frames]
+
     def select_no_weapon(self):
         self.active_run_anim = 'RUN'
         self.active_walljump_anim = 'WALLJUMP'
@@ -0,0 +1,144 @@
+import hashlib, json, math, os, pygame
+
+from src.utils import get_user_folder
+
+# Cached atlas format (two files per sprite sheet, layout and scale):
+#
+#   png:    the frames facing right, cut from the sprite sheet and scaled, packed in a grid
+#   json:   the height of the scaled sprite sheet and the rect of each frame in the png, per animation
+#
+# The frames facing left are flipped when loading, which is cheap compared to the smoothscale of the sheet.
+
+VERSION = 1
+
+
+class AnimationAtlas:
+    """The frames of the player animations, cut from the sprite sheet and scaled to the game.
+
+    Building the frames takes a smoothscale of the whole sprite sheet and a scale and flip per frame, so an
+    atlas is only built once per sprite sheet, layout and scale and shared by all Animation instances (one
+    is created on every respawn). It is also cached in the user folder, so a later start at the same
+    resolution only loads a png."""
+
+    # the atlases built or loaded in this process
+    atlases: dict[tuple, 'AnimationAtlas'] = {}
+
+    def __init__(self, layout: dict, frames: dict, sheet_height: float):
+        # animation name to a frame (for a tuple in the layout) or a list of frames
+        self.frames = frames
+        self.frames_left = {}
+        for anim, anim_frames in frames.items():
+            if isinstance(anim_frames, list):
+                self.frames_left[anim] = [pygame.transform.flip(frame, True, False) for frame in anim_frames]
+            else:
+                self.frames_left[anim] = pygame.transform.flip(anim_frames, True, False)
+        self.sheet_height = sheet_height
+
+        # keys of the frames (animation, index, direction), the same for all instances (see RotationCache)
+        self.frame_keys = {}
+        for direction, direction_frames in (('right', self.frames), ('left', self.frames_left)):
+            for anim, anim_frames in direction_frames.items():
+                for i, frame in enumerate(anim_frames if isinstance(layout[anim], list) else [anim_frames]):
+                    self.frame_keys[frame] = (anim, i, direction)
+
+    @staticmethod
+    def get(sheet_path: str, layout: dict, sheet_scale: float, scale: float):
+        """Returns the atlas of the sprite sheet, with the frames at the rects of the layout (of the sheet
+        scaled by sheet_scale) scaled by scale. Loads it from the cache or builds (and caches) it."""
+        key = (sheet_path, os.path.getmtime(sheet_path), sheet_scale, scale, json.dumps(layout))
+        atlas = AnimationAtlas.atlases.get(key, None)
+        if atlas is not None:
+            return atlas
+
+        cache_file = AnimationAtlas.get_cache_file(sheet_path, layout, sheet_scale, scale)
+        atlas = None
+        if os.path.isfile(cache_file + '.json') and os.path.isfile(cache_file + '.png'):
+            try:
+                atlas = AnimationAtlas.read(cache_file, layout)
+            except (OSError, ValueError, KeyError, pygame.error) as e:
+                print(f'Could not read animation atlas {cache_file}, rebuilding: {e}')
+
+        if atlas is None:
+            atlas = AnimationAtlas.build(sheet_path, layout, sheet_scale, scale)
+            atlas.write(cache_file, layout)
+
+        AnimationAtlas.atlases[key] = atlas
+        return atlas
+
+    @staticmethod
+    def get_cache_file(sheet_path: str, layout: dict, sheet_scale: float, scale: float):
+        """Path of the cached atlas without extension, named by a hash of the sprite sheet, the layout, the
+        scales and the format version"""
+        digest = hashlib.sha1(f'{VERSION}:{sheet_scale!r}:{scale!r}:{json.dumps(layout)}'.encode())
+        with open(sheet_path, 'rb') as file:
+            digest.update(file.read())
+        name = os.path.splitext(os.path.basename(sheet_path))[0]
+        return os.path.join(get_user_folder('cache', 'animations'), f'{name}-{scale:g}-{digest.hexdigest()[:16]}')
+
+    @staticmethod
+    def build(sheet_path: str, layout: dict, sheet_scale: float, scale: float):
+        sprite_sheet = pygame.image.load(sheet_path)
+        new_size = (sprite_sheet.get_width() * sheet_scale, sprite_sheet.get_height() * sheet_scale)
+        sprite_sheet = pygame.transform.smoothscale(sprite_sheet, new_size).convert_alpha()
+
+        def cut(rect):
+            new_frame = sprite_sheet.subsurface(rect).copy()
+            return pygame.transform.scale(new_frame, (new_frame.get_width() * scale, new_frame.get_height() * scale))
+
+        frames = {}
+        for anim, rects in layout.items():
+            frames[anim] = [cut(rect) for rect in rects] if isinstance(rects, list) else cut(rects)
+        return AnimationAtlas(layout, frames, sprite_sheet.get_height())
+
+    def write(self, cache_file: str, layout: dict):
+        frames = [(anim, frame) for anim, anim_frames in self.frames.items() for frame in (anim_frames if isinstance(layout[anim], list) else [anim_frames])]
+        cell_width = max(frame.get_width() for _, frame in frames)
+        cell_height = max(frame.get_height() for _, frame in frames)
+        columns = math.ceil(math.sqrt(len(frames)))
+        rows = math.ceil(len(frames) / columns)
+
+        surface = pygame.Surface((columns * cell_width, rows * cell_height), pygame.SRCALPHA)
+        rects = {}
+        for i, (anim, frame) in enumerate(frames):
+            rect = ((i % columns) * cell_width, (i // columns) * cell_height, frame.get_width(), frame.get_height())
+            surface.blit(frame, rect[:2])
+            rects.setdefault(anim, []).append(rect)
+
+        # write to temporary files first, so an interrupted write never leaves a broken cache behind
+        try:
+            pygame.image.save(surface, cache_file + '.tmp.png')
+            os.replace(cache_file + '.tmp.png', cache_file + '.png')
+            with open(cache_file + '.tmp.json', 'w') as file:
+                json.dump({'sheet_height': self.sheet_height, 'frames': rects}, file)
+            os.replace(cache_file + '.tmp.json', cache_file + '.json')
+        except (OSError, pygame.error) as e:
+            print(f'Could not write animation atlas {cache_file}: {e}')
+            return
+
+        # remove the outdated atlases of this sprite sheet and scale
+        folder = os.path.dirname(cache_file)
+        prefix = os.path.basename(cache_file)[:-16]
+        try:
+            for file_name in os.listdir(folder):
+                path = os.path.join(folder, file_name)
+                if file_name.startswith(prefix) and not path.startswith(cache_file):
+                    os.remove(path)
+        except OSError as e:
+            print(f'Could not remove outdated animation atlases: {e}')
+
+    @staticmethod
+    def read(cache_file: str, layout: dict):
+        with open(cache_file + '.json') as file:
+            meta = json.load(file)
+        surface = pygame.image.load(cache_file + '.png').convert_alpha()
+
+        frames = {}
+        for anim, rects in layout.items():
+            anim_frames = [surface.subsurface(rect).copy() for rect in meta['frames'][anim]]
+            if isinstance(rects, list):
+                if len(anim_frames) != len(rects):
+                    raise ValueError(f'Wrong number of frames for {anim}')
+                frames[anim] = anim_frames
+            else:
+                frames[anim] = anim_frames[0]
+        return AnimationAtlas(layout, frames, meta['sheet_height'])
@@ -0,0 +1,110 @@
+import os, pygame, time
+
+from src import config, sounds
+
+
+class Assets:
+    """Process wide registry of the sprites and sounds shared by many objects, e.g. all jump pads of a map.
+
+    Paths are relative to the assets folder. Each sprite is loaded and scaled once per scale, each sound
+    is loaded once, and regions cut from a sprite (e.g. animation frames) are only cut once, so loading a
+    map doesn't take longer with every object using them. The surfaces are shared, don't draw on them."""
+
+    def __init__(self):
+        self.images: dict[tuple, pygame.Surface] = {}
+        self.regions: dict[tuple, pygame.Surface] = {}
+        self.sounds: dict[str, pygame.mixer.Sound] = {}
+        # the sizes of the images as stored, also known without a display
+        self.sizes: dict[str, tuple[int, int]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+
+    @staticmethod
+    def get_size(surface: pygame.Surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def get_image_size(self, path: str, scale: float = 1.0):
+        """Returns the size of the image scaled by scale, without converting it for the display"""
+        size = self.sizes.get(path, None)
+        if size is None:
+            start = time.perf_counter()
+            size = self.sizes[path] = pygame.image.load(os.path.join(config.assets_folder, path)).get_size()
+            self.load_time += time.perf_counter() - start
+        return int(size[0] * scale), int(size[1] * scale)
+
+    def get_image(self, path: str, scale: float = 1.0, smooth: bool = False):
+        """Returns the image converted to the display format and scaled by scale (with smoothscale if smooth)"""
+        key = (path, scale, smooth)
+        image = self.images.get(key, None)
+        if image is not None:
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        original = None if scale == 1 else self.get_image(path)
+        start = time.perf_counter()
+        if original is None:
+            image = pygame.image.load(os.path.join(config.assets_folder, path)).convert_alpha()
+            self.sizes[path] = image.get_size()
+        else:
+            new_size = (original.get_width() * scale, original.get_height() * scale)
+            image = pygame.transform.smoothscale(original, new_size) if smooth else pygame.transform.scale(original, new_size)
+        self.images[key] = image
+        self.bytes += self.get_size(image)
+        self.load_time += time.perf_counter() - start
+        return image
+
+    def get_region(self, path: str, scale: float, rect: tuple, flipped: bool = False, smooth: bool = False):
+        """Returns a copy of the rect of the scaled image (see get_image), flipped horizontally if flipped"""
+        key = (path, scale, smooth, rect, flipped)
+        region = self.regions.get(key, None)
+        if region is not None:
+            self.hits += 1
+            return region
+
+        self.misses += 1
+        if flipped:
+            region = pygame.transform.flip(self.get_region(path, scale, rect, smooth=smooth), True, False)
+        else:
+            region = self.get_image(path, scale, smooth).subsurface(rect).copy()
+        self.regions[key] = region
+        self.bytes += self.get_size(region)
+        return region
+
+    def get_sound(self, path: str):
+        """Returns the sound, a silent stand-in without a display"""
+        if config.headless:
+            return sounds.NullSound()
+
+        sound = self.sounds.get(path, None)
+        if sound is not None:
+            self.hits += 1
+            return sound
+
+        self.misses += 1
+        start = time.perf_counter()
+        sound = self.sounds[path] = pygame.mixer.Sound(os.path.join(config.assets_folder, path))
+        self.load_time += time.perf_counter() - start
+        return sound
+
+    def clear(self):
+        self.images.clear()
+        self.regions.clear()
+        self.sounds.clear()
+        self.bytes = 0
+
+    def get_stats(self):
+        return {
+            'images': len(self.images),
+            'regions': len(self.regions),
+            'sounds': len(self.sounds),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'load_ms': self.load_time * 1000,
+        }
+
+
+assets = Assets()
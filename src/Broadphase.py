@@ -0,0 +1,76 @@
+import math
+
+from src.ActiveSet import ActiveSet
+
+
+class Broadphase:
+    """Finds the active objects near an area without scanning whole buckets of the active set.
+
+    The map is cut into columns. Objects are added to each column their collision area overlaps
+    (inclusive, like the spatial index), in load order. The active objects of a column are cached until
+    the active set changes. A query returns the active objects of the columns under the area, still in
+    load order, so checking the candidates finds the same object first as checking the bucket did.
+
+    Small buckets are returned as they are, scanning a few objects is cheaper than looking them up."""
+
+    # buckets with up to this many objects are not looked up
+    MAX_SCAN = 12
+
+    def __init__(self, active_set: ActiveSet, column_width: float):
+        self.active_set = active_set
+        self.column_width = column_width
+        self.columns: dict[str, dict[int, list]] = {name: {} for name in active_set.buckets}
+        self.active_columns: dict[str, dict[int, list]] = {name: {} for name in active_set.buckets}
+        self.version = active_set.version
+
+    def insert(self, object, bbox: tuple, bucket_name: str):
+        columns = self.columns[bucket_name]
+        for column in range(math.floor(bbox[0] / self.column_width), math.floor(bbox[2] / self.column_width) + 1):
+            columns.setdefault(column, []).append(object)
+
+    def query(self, bucket_name: str, x1: float, x2: float):
+        """Returns the active objects of a bucket which may intersect the area from x1 to x2, in load order"""
+        bucket = self.active_set.buckets[bucket_name]
+        if len(bucket) <= self.MAX_SCAN:
+            return bucket
+
+        if self.version != self.active_set.version:
+            self.version = self.active_set.version
+            for active_columns in self.active_columns.values():
+                active_columns.clear()
+
+        min_column = math.floor(x1 / self.column_width)
+        max_column = math.floor(x2 / self.column_width)
+        if min_column == max_column:
+            return self.get_active_column(bucket_name, min_column)
+
+        candidates = set()
+        for column in range(min_column, max_column + 1):
+            candidates.update(self.get_active_column(bucket_name, column))
+        return sorted(candidates, key=self.active_set.ranks.__getitem__)
+
+    def find_overlap(self, bucket_name: str, x: float, y: float, w: float, h: float):
+        """Returns the first active object of a bucket whose rectangle overlaps the area, or None.
+        Same as Rectangle.check_collisions on the candidates, but without a rectangle for the area."""
+        for object in self.query(bucket_name, x, x + w):
+            shape = object.shape
+            if not (shape.pos.x + shape.w <= x or shape.pos.x >= x + w or shape.pos.y + shape.h <= y or shape.pos.y >= y + h):
+                return object
+        return None
+
+    def find_containing(self, bucket_name: str, x: float, y: float):
+        """Returns the first active object of a bucket whose rectangle contains the point (edges included), or None"""
+        for object in self.query(bucket_name, x, x):
+            shape = object.shape
+            if shape.pos.x <= x <= shape.pos.x + shape.w and shape.pos.y <= y <= shape.pos.y + shape.h:
+                return object
+        return None
+
+    def get_active_column(self, bucket_name: str, column: int):
+        active_columns = self.active_columns[bucket_name]
+        active_column = active_columns.get(column, None)
+        if active_column is None:
+            active = self.active_set.active
+            active_column = [object for object in self.columns[bucket_name].get(column, []) if object in active]
+            active_columns[column] = active_column
+        return active_column
@@ -3,18 +3,32 @@ from abc import abstractmethod, ABC
 from src.Settings import Settings
 from src.SimpleRect import SimpleRect
 from src.Vector2 import Vector2
+from src import utils
 
 class Camera(SimpleRect, ABC):
     def __init__(self, settings: Settings, pos = Vector2()):
         super(Camera, self).__init__(pos, settings.resolution[0], settings.resolution[1])
 
         self.settings = settings
+        # reused by to_view_space for positions which are only needed until the next call
+        self.view_pos = Vector2()
 
     def calculate_offset(self):
         return self.w / 2 - 220 * self.settings.get_scale()
 
-    def to_view_space(self, pos):
-        return Vector2(pos.x - self.pos.x, pos.y - self.pos.y)
+    def to_view_space(self, pos, out: Vector2|None = None):
+        """Returns the position relative to the camera. It is written into out if given, which avoids
+        allocating a vector for every object drawn (e.g. pass camera.view_pos)."""
+        if out is None:
+            return Vector2(pos.x - self.pos.x, pos.y - self.pos.y)
+        return out.set(pos.x - self.pos.x, pos.y - self.pos.y)
+
+    def get_state(self):
+        return {'values': utils.get_plain_values(self), 'pos': [self.pos.x, self.pos.y]}
+
+    def set_state(self, state):
+        utils.set_plain_values(self, state['values'])
+        self.pos.x, self.pos.y = state['pos']
 
     @abstractmethod
     def update(self, player):
@@ -1,4 +1,4 @@
-import pygame
+from src import config
 from src.Camera import Camera
 from src.Settings import Settings
 
@@ -33,7 +33,7 @@ class CameraAI(Camera):
         if self.max_lookahead is None:
             self.max_lookahead = self.h * 0.4 - player.shape.h
 
-        current_time = pygame.time.get_ticks()  # ms timestamp
+        current_time = config.ticks  # ms timestamp
 
         # --- Track falling state ---
         if player.vel.y > 0:  # falling
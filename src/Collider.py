@@ -5,6 +5,9 @@ from src.Triangle import Triangle
 
 class Collider(GameObject):
     """Class for static colliders"""
+
+    __slots__ = ('type',)
+
     def __init__(self, shape: Rectangle|Triangle, type: str):
         super(Collider, self).__init__(shape)
         self.type: str = type
\ No newline at end of file
@@ -0,0 +1,285 @@
+import hashlib, json, os, pygame, yaml, zipfile, zlib
+import numpy as np
+
+from src import config
+from src.Rectangle import Rectangle
+from src.Texture import Texture
+from src.Triangle import Triangle
+from src.Vector2 import Vector2
+from src.utils import get_user_folder
+
+# Compiled map format (npz, one file per map and scale):
+#
+#   meta:               json with the spawn, start and finish line, items, portals, jump pads and backgrounds
+#   bbox:               bounds of all objects (f64 x4)
+#   rects:              x, y, w, h of the rectangle colliders in map order (f64 x4)
+#   rect_types:         index into WALL_TYPES (u8)
+#   rect_surfaces:      index into the atlas or -1 (i32)
+#   triangles:          x1, y1, x2, y2, x3, y3 of the ramps in map order (f64 x6)
+#   triangle_surfaces:  index into the atlas or -1 (i32)
+#   atlas:              pre-rendered collider surfaces, zlib compressed BGRA, concatenated (u8)
+#   atlas_index:        offset, length, width, height of each surface in the atlas (i64 x4)
+#
+# All positions are already multiplied with the scale, with the same float operations as when loading the yaml,
+# so a compiled map creates exactly the same objects (and replays stay deterministic).
+# Identical surfaces (same texture, size and offsets) are only stored and loaded once. The surfaces are stored
+# in the pixel layout of a SRCALPHA surface, so they are used as they come out of zlib, without another copy.
+# (Memory mapping them uncompressed would need close to 1GB per map at 1080p.)
+
+VERSION = 2
+WALL_TYPES = ['static', 'wall', 'deco', 'death']
+
+
+class CompiledMap:
+    """Map data with all values scaled and the textures of the colliders pre-rendered"""
+
+    def __init__(self, map_name: str, scale: float):
+        self.map_name = map_name
+        self.scale = scale
+        self.meta = {}
+        self.bbox = (float("inf"), float("inf"), float("-inf"), float("-inf"))
+        self.rects: list[tuple] = []
+        self.rect_types: list[int] = []
+        self.rect_textures: list[tuple|None] = []
+        self.rect_surfaces: list[int] = []
+        self.triangles: list[tuple] = []
+        self.triangle_textures: list[tuple|None] = []
+        self.triangle_surfaces: list[int] = []
+        self.surfaces: list[pygame.Surface|None] = []
+
+    @staticmethod
+    def get_map_folder(map_name: str):
+        return os.path.join(config.assets_folder, 'maps', map_name)
+
+    @staticmethod
+    def get_hash(map_name: str, scale: float):
+        """Hash of all files of the map (the yaml and its textures), the scale and the format version"""
+        map_folder = CompiledMap.get_map_folder(map_name)
+        digest = hashlib.sha1(f'{VERSION}:{scale!r}'.encode())
+        for folder, dirs, files in sorted(os.walk(map_folder)):
+            dirs.sort()
+            for file_name in sorted(files):
+                path = os.path.join(folder, file_name)
+                digest.update(os.path.relpath(path, map_folder).replace(os.sep, '/').encode())
+                with open(path, 'rb') as file:
+                    digest.update(file.read())
+        return digest.hexdigest()
+
+    @staticmethod
+    def get_cache_file(map_name: str, scale: float, digest: str = None):
+        digest = digest or CompiledMap.get_hash(map_name, scale)
+        return os.path.join(get_user_folder('cache', 'maps'), f'{map_name}-{scale:g}-{digest[:16]}.npz')
+
+    @staticmethod
+    def load(map_name: str, scale: float):
+        """Returns the compiled map from the cache, compiles (and caches) it if the map or the scale changed.
+        Without a display the colliders are not rendered and nothing is written to the cache."""
+        digest = CompiledMap.get_hash(map_name, scale)
+        cache_file = CompiledMap.get_cache_file(map_name, scale, digest)
+        if os.path.isfile(cache_file):
+            try:
+                return CompiledMap.read(cache_file, map_name, scale, with_surfaces=not config.headless)
+            except (OSError, ValueError, KeyError, zlib.error, zipfile.BadZipFile) as e:
+                print(f'Could not read compiled map {cache_file}, recompiling: {e}')
+                # a broken file would fail again on every load until it is replaced
+                try:
+                    os.remove(cache_file)
+                except OSError:
+                    pass
+
+        compiled = CompiledMap.compile(map_name, scale)
+        if not config.headless:
+            compiled.render_surfaces()
+            compiled.write(cache_file)
+        return compiled
+
+    @staticmethod
+    def compile(map_name: str, scale: float):
+        """Reads the map yaml and scales all values, the surfaces are rendered separately"""
+        SCALE = scale
+        compiled = CompiledMap(map_name, scale)
+        map_folder = CompiledMap.get_map_folder(map_name)
+
+        with open(os.path.join(map_folder, 'map.yaml'), 'r') as file:
+            data = yaml.load(file, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+        meta = compiled.meta
+
+        spawnpoint = data.get('player_spawnpoint', None)
+        if spawnpoint is not None:
+            meta['player_start'] = [spawnpoint['x'] * SCALE, spawnpoint['y'] * SCALE]
+
+        start_line = data.get('start_line', None)
+        if start_line is not None:
+            meta['start_line'] = [start_line['x'] * SCALE, start_line['y'] * SCALE]
+
+        finish_line = data.get('finish_line', None)
+        if finish_line is not None:
+            meta['finish_line'] = [finish_line['x'] * SCALE, finish_line['y'] * SCALE]
+
+        # 'quadtree' or 'strip' (see create_spatial_index in Map)
+        meta['spatial_index'] = data.get('spatial_index', 'quadtree')
+
+        for background in ['sky', 'parallax_1', 'parallax_2']:
+            meta[background] = data.get(background, None)
+
+        min_x = float("inf")
+        max_x = float("-inf")
+        min_y = float("inf")
+        max_y = float("-inf")
+
+        meta['items'] = []
+        for item in data.get('items', None) or []:
+            min_x = min(item['x'] * SCALE, min_x)
+            max_x = max(item['x'] * SCALE, max_x)
+            min_y = min(item['y'] * SCALE, min_y)
+            max_y = max(item['y'] * SCALE, max_y)
+            meta['items'].append([item['type'], item['x'] * SCALE, item['y'] * SCALE + 12 * SCALE, 16 * SCALE, 16 * SCALE, item['ammo'], item['stay']])
+
+        meta['portals'] = []
+        for portal in data.get('portals', None) or []:
+            # the bounds only take the portal entry into account, as they always did
+            min_x = min(portal['entry_x'] * SCALE, portal['exit_x'] * SCALE, min_x)
+            max_x = max(portal['entry_x'] * SCALE, portal['entry_x'] * SCALE, max_x)
+            min_y = min(portal['entry_y'] * SCALE, portal['entry_y'] * SCALE, min_y)
+            max_y = max(portal['entry_y'] * SCALE, portal['entry_y'] * SCALE, max_y)
+            meta['portals'].append([portal['entry_x'] * SCALE, portal['entry_y'] * SCALE, portal.get('entry_flipped', False), portal['exit_x'] * SCALE, portal['exit_y'] * SCALE, portal.get('exit_flipped', False)])
+
+        meta['jump_pads'] = []
+        for jump_pad in data.get('jump_pads', None) or []:
+            min_x = min(jump_pad['x'] * SCALE, min_x)
+            max_x = max(jump_pad['x'] * SCALE, max_x)
+            min_y = min(jump_pad['y'] * SCALE, min_y)
+            max_y = max(jump_pad['y'] * SCALE, max_y)
+            meta['jump_pads'].append([jump_pad['x'] * SCALE, jump_pad['y'] * SCALE, jump_pad['vel_x'] * SCALE, jump_pad['vel_y'] * SCALE])
+
+        for rect in data.get('rectangles', None) or []:
+            min_x = min(rect['x'] * SCALE, min_x)
+            max_x = max(rect['x'] * SCALE + rect['w'] * SCALE, max_x)
+            min_y = min(rect['y'] * SCALE, min_y)
+            max_y = max(rect['y'] * SCALE + rect['h'] * SCALE, max_y)
+
+            # unknown wall types only count for the bounds
+            if rect['wall_type'] not in WALL_TYPES:
+                continue
+
+            compiled.rects.append((rect['x'] * SCALE, rect['y'] * SCALE, int(rect['w'] * SCALE), int(rect['h'] * SCALE)))
+            compiled.rect_types.append(WALL_TYPES.index(rect['wall_type']))
+            compiled.rect_textures.append(CompiledMap.get_texture_params(map_folder, rect, SCALE))
+
+        for triangle in data.get('triangles', None) or []:
+            points = triangle.get('points', None)
+            for p in points:
+                min_x = min(p['x'] * SCALE, min_x)
+                max_x = max(p['x'] * SCALE, max_x)
+                min_y = min(p['y'] * SCALE, min_y)
+                max_y = max(p['y'] * SCALE, max_y)
+
+            if triangle['wall_type'] != 'ramp':
+                continue
+
+            compiled.triangles.append(tuple(value * SCALE for p in points[:3] for value in (p['x'], p['y'])))
+            compiled.triangle_textures.append(CompiledMap.get_texture_params(map_folder, triangle, SCALE))
+
+        compiled.bbox = (min_x, min_y, max_x, max_y)
+        compiled.rect_surfaces = [-1] * len(compiled.rects)
+        compiled.triangle_surfaces = [-1] * len(compiled.triangles)
+        return compiled
+
+    @staticmethod
+    def get_texture_params(map_folder: str, shape: dict, SCALE: float):
+        if shape.get('texture', None) is None:
+            return None
+        return (os.path.join(map_folder, shape['texture']), shape.get('texture_scale', 1) * SCALE, shape.get('texture_offset_x', 0) * SCALE, shape.get('texture_offset_y', 0) * SCALE, shape.get('texture_rotation', 0))
+
+    def render_surfaces(self):
+        """Tiles the textures of all colliders into their surfaces, needs a display mode"""
+        surfaces = {}
+        self.surfaces = []
+
+        def add_surface(surface: pygame.Surface):
+            data = pygame.image.tobytes(surface, 'BGRA')
+            key = (surface.get_size(), hashlib.sha1(data).digest())
+            if key not in surfaces:
+                surfaces[key] = len(self.surfaces)
+                self.surfaces.append(surface)
+            return surfaces[key]
+
+        for i, (rect, params) in enumerate(zip(self.rects, self.rect_textures)):
+            if params is not None:
+                x, y, w, h = rect
+                self.rect_surfaces[i] = add_surface(Rectangle(Vector2(x, y), w, h, Texture(*params)).surface)
+
+        for i, (points, params) in enumerate(zip(self.triangles, self.triangle_textures)):
+            if params is not None:
+                x1, y1, x2, y2, x3, y3 = points
+                self.triangle_surfaces[i] = add_surface(Triangle(Vector2(x1, y1), Vector2(x2, y2), Vector2(x3, y3), Texture(*params)).surface)
+
+    def write(self, file_path: str):
+        atlas = []
+        atlas_index = []
+        offset = 0
+        for surface in self.surfaces:
+            data = zlib.compress(pygame.image.tobytes(surface, 'BGRA'))
+            atlas.append(data)
+            atlas_index.append((offset, len(data), surface.get_width(), surface.get_height()))
+            offset += len(data)
+
+        # write to a temporary file first, so an interrupted compile never leaves a broken cache behind
+        temp_path = file_path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            np.savez(file,
+                meta=np.array(json.dumps(self.meta)),
+                bbox=np.array(self.bbox, dtype=np.float64),
+                rects=np.array(self.rects, dtype=np.float64).reshape(-1, 4),
+                rect_types=np.array(self.rect_types, dtype=np.uint8),
+                rect_surfaces=np.array(self.rect_surfaces, dtype=np.int32),
+                triangles=np.array(self.triangles, dtype=np.float64).reshape(-1, 6),
+                triangle_surfaces=np.array(self.triangle_surfaces, dtype=np.int32),
+                atlas=np.frombuffer(b''.join(atlas), dtype=np.uint8),
+                atlas_index=np.array(atlas_index, dtype=np.int64).reshape(-1, 4),
+            )
+        os.replace(temp_path, file_path)
+
+        # remove the outdated compilations of this map and scale
+        folder = os.path.dirname(file_path)
+        prefix = f'{self.map_name}-{self.scale:g}-'
+        for file_name in os.listdir(folder):
+            path = os.path.join(folder, file_name)
+            if file_name.startswith(prefix) and file_name.endswith('.npz') and path != file_path:
+                os.remove(path)
+
+    @staticmethod
+    def read(file_path: str, map_name: str, scale: float, with_surfaces: bool = True):
+        compiled = CompiledMap(map_name, scale)
+        with np.load(file_path) as data:
+            compiled.meta = json.loads(str(data['meta']))
+            compiled.bbox = tuple(data['bbox'].tolist())
+            # tolist converts to python floats and ints, so the objects are the same as when loaded from the yaml
+            compiled.rects = [(x, y, int(w), int(h)) for x, y, w, h in data['rects'].tolist()]
+            compiled.rect_types = data['rect_types'].tolist()
+            compiled.rect_surfaces = data['rect_surfaces'].tolist()
+            compiled.triangles = [tuple(points) for points in data['triangles'].tolist()]
+            compiled.triangle_surfaces = data['triangle_surfaces'].tolist()
+            compiled.rect_textures = [None] * len(compiled.rects)
+            compiled.triangle_textures = [None] * len(compiled.triangles)
+
+            if with_surfaces:
+                atlas = data['atlas'].tobytes()
+                compiled.surfaces = [
+                    pygame.image.frombuffer(zlib.decompress(atlas[offset:offset + length]), (width, height), 'BGRA')
+                    for offset, length, width, height in data['atlas_index'].tolist()
+                ]
+            else:
+                compiled.rect_surfaces = [-1] * len(compiled.rects)
+                compiled.triangle_surfaces = [-1] * len(compiled.triangles)
+
+        return compiled
+
+    def get_rect_surface(self, index: int):
+        surface_index = self.rect_surfaces[index]
+        return self.surfaces[surface_index] if surface_index >= 0 else None
+
+    def get_triangle_surface(self, index: int):
+        surface_index = self.triangle_surfaces[index]
+        return self.surfaces[surface_index] if surface_index >= 0 else None
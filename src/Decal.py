@@ -4,6 +4,9 @@ from src import config
 
 def pre_load_decals(SCALE:int = 1):
     for decal in ['dash1', 'dash2', 'dash1_left', 'dash2_left', 'rocket', 'plasma']:
+        if config.headless:
+            Decal.types[decal] = None
+            continue
         Decal.types[decal] = pygame.image.load(os.path.join(config.assets_folder, 'graphics', f'decal_{decal}.png')).convert_alpha()
         if SCALE != 1:
             Decal.types[decal] = pygame.transform.scale(Decal.types[decal], (Decal.types[decal].get_width() * SCALE, Decal.types[decal].get_height() * SCALE))
@@ -11,6 +14,8 @@ def pre_load_decals(SCALE:int = 1):
 
 class Decal(Vector2):
 
+    __slots__ = ('duration', 'center', 'bottom', 'fade_out', 'sprite', 'start_time')
+
     types = {}
 
     def __init__(self, type: str, duration, x, y, center: bool = False, bottom: bool=False, fade_out=False):
@@ -20,10 +25,10 @@ class Decal(Vector2):
         self.bottom = bottom
         self.fade_out = fade_out
         self.sprite = Decal.types[type]
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = config.ticks
 
     def draw(self, surface, camera):
-        view_pos = camera.to_view_space(Vector2(self.x, self.y))
+        view_pos = camera.to_view_space(self, camera.view_pos)
         if self.center:
             pos = (view_pos.x - self.sprite.get_width() / 2, view_pos.y - self.sprite.get_height() / 2)
         elif self.bottom:
@@ -32,7 +37,7 @@ class Decal(Vector2):
             pos = (view_pos.x, view_pos.y)
 
         if self.fade_out:
-            current_time = pygame.time.get_ticks()
+            current_time = config.ticks
             elapsed_time = current_time - self.start_time
             progress = min(1.0, elapsed_time / self.duration)
             alpha = 255 - int(255 * progress)
@@ -41,4 +46,4 @@ class Decal(Vector2):
         surface.blit(self.sprite, pos)
 
     def is_expired(self):
-        return self.start_time + self.duration < pygame.time.get_ticks()
\ No newline at end of file
+        return self.start_time + self.duration < config.ticks
\ No newline at end of file
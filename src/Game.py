@@ -1,5 +1,6 @@
 import copy, os, pygame
 
+from src.Assets import assets
 from src.CameraAi import CameraAI
 from src.CameraFixed import CameraFixed
 from src.CameraLookahead import CameraLookahead
@@ -8,13 +9,16 @@ from src.Input import Input
 from src.Scene import GameScene
 from src.Map import Map
 from src.Player import Player
+from src.Profiler import create_profiler
+from src.Replay import Replay, ReplayRecorder
 from src import config
 from src.Settings import Settings
 from src.HUD import HUD
 
 from src.Decal import pre_load_decals
 from src.Item import pre_load_items
-from src.Projectile import pre_load_projectiles
+from src.Portal import pre_load_portals
+from src.ProjectilePool import pre_load_projectiles
 
 def create_camera(settings: Settings):
     if settings.camera_style == 'fixed':
@@ -33,46 +37,128 @@ def create_camera(settings: Settings):
 
 class Game(GameScene):
     """Contains main loop and handles the game"""
-    def __init__(self, map: str, surface: pygame.Surface, clock: pygame.time.Clock, settings: Settings = None):
+    def __init__(self, map: str, surface: pygame.Surface, clock: pygame.time.Clock, settings: Settings = None, replay: Replay = None):
         super().__init__(surface, clock, settings)
 
         game_scale = settings.get_scale()
         pre_load_decals(game_scale)
         pre_load_items(game_scale)
         pre_load_projectiles(game_scale)
+        pre_load_portals(game_scale)
 
         self.camera = create_camera(settings)
-        self.hud = HUD(self)
+        self.profiler = create_profiler(settings)
+        self.hud = None if config.headless else HUD(self)
         self.map = Map(self)
         self.player = Player(self)
         self.map.load(map)
         self.player.set_map(self.map)
         self.last_velocity = 0
-        self.start_time = pygame.time.get_ticks()
         self.input_mappings = None
         self.show_options = False
+        self.previous_state = None
+
+        # number of physics steps since the start, inputs and replays are keyed by it
+        self.tick = 0
+        self.player_actions = {
+            Input.LEFT: self.player.input_left,
+            Input.RIGHT: self.player.input_right,
+            Input.UP: self.player.input_up,
+            Input.DOWN: self.player.input_down,
+            Input.JUMP: self.player.input_jump,
+            Input.WALL_JUMP: self.player.input_wall_jump,
+            Input.SHOOT: lambda v: setattr(self.player, "pressed_shoot", v),
+            Input.SWITCH_WEAPON: self.player.input_switch_weapon,
+        }
+
+        self.replay = replay
+        self.recorder = None
+        if replay is None and settings.get('record') is not None:
+            self.recorder = ReplayRecorder(settings.get('record'), map, settings)
+
+    def store_previous_state(self):
+        self.previous_state = (self.player.pos.x, self.player.pos.y, self.camera.pos.x, self.camera.pos.y)
+
+    def draw(self, alpha: float = 1.0):
+        """Draws the scene between the last two physics steps, alpha being the progress towards the current one"""
+        player_pos = self.player.pos
+        camera_pos = self.camera.pos
+        current_state = (player_pos.x, player_pos.y, camera_pos.x, camera_pos.y)
+
+        interpolate = self.previous_state is not None and alpha < 1.0
+        if interpolate:
+            previous_state = self.previous_state
+            # don't interpolate across teleports and respawns
+            if abs(current_state[0] - previous_state[0]) > self.camera.w / 4 or abs(current_state[1] - previous_state[1]) > self.camera.h / 4:
+                interpolate = False
+            else:
+                player_pos.x = previous_state[0] + (current_state[0] - previous_state[0]) * alpha
+                player_pos.y = previous_state[1] + (current_state[1] - previous_state[1]) * alpha
+                camera_pos.x = previous_state[2] + (current_state[2] - previous_state[2]) * alpha
+                camera_pos.y = previous_state[3] + (current_state[3] - previous_state[3]) * alpha
 
-    def draw(self):
         self.map.draw()
         self.player.draw()
+        self.profiler.lap('draw_player')
         self.map.draw_front()
         self.hud.draw()
+        self.profiler.lap('draw_hud')
+        self.profiler.draw(self.surface)
+        self.profiler.lap('draw_profiler')
+
+        if interpolate:
+            player_pos.x, player_pos.y, camera_pos.x, camera_pos.y = current_state
+
+    def get_state(self):
+        """Returns a json serializable snapshot of the simulation, used as keyframe in replays"""
+        return {
+            'tick': self.tick,
+            'ticks': config.ticks,
+            'player': self.player.get_state(),
+            'camera': self.camera.get_state(),
+            'map': self.map.get_state(),
+        }
+
+    def set_state(self, state):
+        self.tick = state['tick']
+        config.ticks = state['ticks']
+        self.player.set_state(state['player'])
+        self.camera.set_state(state['camera'])
+        # the map refreshes its active objects around the restored camera
+        self.map.set_state(state['map'])
+        self.previous_state = None
 
     def update_settings(self):
         self.camera = create_camera(self.settings)
         pass
 
     def update(self):
-        # let it "load" a few milliseconds to avoid missing out collision checks
-        # causing the player to fall out of the map at higher screen resolutions
-        if self.start_time + 333 > pygame.time.get_ticks():
-            return
-
-        self.hud.update()
+        if self.hud is not None:
+            self.hud.update()
         self.player.update()
+        self.profiler.lap('player')
         self.camera.update(self.player)
+        self.profiler.lap('camera')
         self.map.update(self.player)
 
+    def step(self):
+        """Advances the simulation by one physics tick"""
+        if self.replay is not None:
+            self.replay.apply_inputs(self)
+
+        if self.recorder is not None and self.tick % self.recorder.keyframe_interval == 0:
+            self.recorder.record_keyframe(self.tick, self.get_state())
+
+        config.delta_time = config.PHYSICS_TICK
+        config.ticks += config.PHYSICS_TICK
+        self.update()
+        self.tick += 1
+
+    def player_input(self, action: str, pressed: bool):
+        if self.recorder is not None:
+            self.recorder.record_input(self.tick, action, pressed)
+        self.player_actions[action](pressed)
+
     def set_quit_really(self):
         self.set_quit()
         if self.next_scene is not None:
@@ -86,33 +172,60 @@ class Game(GameScene):
         menu.set_next_scene(self)
         menu.game_loop(entrypoint=['SETTINGS'], force_quit=True)
 
+        # the game is paused while the settings are open
+        self.clock.tick()
+        self.profiler.begin_frame()
+
     def init_input_mappings(self):
-        self.input_mappings = {
-            Input.LEFT: lambda v, e: self.player.input_left(v),
-            Input.RIGHT: lambda v, e: self.player.input_right(v),
-            Input.UP: lambda v, e: self.player.input_up(v),
-            Input.DOWN: lambda v, e: self.player.input_down(v),
-            Input.JUMP: lambda v, e: self.player.input_jump(v),
-            Input.WALL_JUMP: lambda v, e: self.player.input_wall_jump(v),
-            Input.SHOOT: lambda v, e: setattr(self.player, "pressed_shoot", v),
-            Input.SWITCH_WEAPON: lambda v, e: self.player.input_switch_weapon(v),
-            Input.BACK: lambda v, e: self.set_quit(v),
-            Input.MENU: lambda v, e: self.show_settings(v),
-        }
+        self.input_mappings = {}
+
+        # while watching a replay the player is controlled by the recorded inputs only
+        if self.replay is None:
+            for action in Input.PLAYER_ACTIONS:
+                self.input_mappings[action] = lambda v, e, action=action: self.player_input(action, v)
+
+        self.input_mappings[Input.BACK] = lambda v, e: self.set_quit(v)
+        if self.profiler.enabled:
+            self.input_mappings[pygame.K_F3] = lambda v, e: self.profiler.toggle_overlay(v)
+        if self.next_scene is not None:
+            self.input_mappings[Input.MENU] = lambda v, e: self.show_settings(v)
 
     def game_loop(self):
+        accumulator = 0
+
+        # don't count the time spent loading as the first frame
+        self.clock.tick()
+
         while True:
-            config.delta_time = self.clock.tick(self.settings.max_fps)
+            frame_time = self.clock.tick(self.settings.max_fps)
+            accumulator += min(frame_time, config.MAX_FRAME_TIME)
+            self.profiler.begin_frame(frame_time)
+
             if self.hud.ready:
                 self.handle_events(self.input_mappings, lambda: self.set_quit_really())
+            self.profiler.lap('input')
+
+            # physics always advance in fixed steps, so they don't depend on the frame rate
+            while accumulator >= config.PHYSICS_TICK:
+                self.store_previous_state()
+                self.step()
+                accumulator -= config.PHYSICS_TICK
+
+            if self.replay is not None and self.replay.is_finished(self):
+                self.set_quit()
 
-            self.update()
-            self.draw()
+            # render side animations advance by the actual frame time
+            config.delta_time = frame_time
+            self.draw(accumulator / config.PHYSICS_TICK)
             pygame.display.update()
+            self.profiler.lap('display')
+            self.profiler.end_frame()
 
             if self.quit:
-                back = pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'menu', 'back.wav'))
-                back.play()
+                if self.recorder is not None:
+                    self.recorder.close(self.tick)
+                self.profiler.close()
+                assets.get_sound(os.path.join('sounds', 'menu', 'back.wav')).play()
                 next_scene = copy.copy(self.next_scene)
                 self.next_scene = None
                 return next_scene
@@ -1,4 +1,6 @@
 class GameObject():
+    __slots__ = ('shape',)
+
     def __init__(self, shape):
         self.shape = shape
 
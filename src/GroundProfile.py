@@ -0,0 +1,96 @@
+import bisect, math
+from array import array
+
+from src.Collider import Collider
+
+
+class GroundProfile:
+    """Surfaces the player can land on (the tops of the static colliders and the edges of the ramps),
+    precomputed at map load, to find the closest surface below a point without looping over the colliders.
+
+    Each surface segment is added to the columns of the map its x range overlaps. Within a column the
+    segments are sorted by their lowest y, next to the running maximum of their highest y. A query
+    bisects to the first segment which can reach below the point and stops as soon as the remaining
+    segments can't be closer than the closest one found.
+
+    The y on a segment is interpolated exactly like Player.get_distance_to_collider_below did it, so the
+    distances are the same to the last bit."""
+
+    def __init__(self, colliders: list[Collider], column_width: float = 64):
+        self.column_width = column_width
+
+        # segments (x1, y1, x2, y2) and the top of their collider, in flat arrays
+        self.segments = array('d')
+        self.tops = array('d')
+
+        segment_columns: dict[int, list[int]] = {}
+        for collider in colliders:
+            for x1, y1, x2, y2 in self.get_segments(collider):
+                segment = len(self.tops)
+                self.segments.extend((x1, y1, x2, y2))
+                self.tops.append(collider.shape.bbox[1])
+                for column in range(math.floor(min(x1, x2) / column_width), math.floor(max(x1, x2) / column_width) + 1):
+                    segment_columns.setdefault(column, []).append(segment)
+
+        # per column: the segments sorted by their lowest y, the lowest y and the running maximum of the highest y
+        self.columns: dict[int, tuple[array, array, array]] = {}
+        for column, column_segments in segment_columns.items():
+            column_segments.sort(key=lambda segment: min(self.segments[segment * 4 + 1], self.segments[segment * 4 + 3]))
+            lows = array('d')
+            max_highs = array('d')
+            max_high = float('-inf')
+            for segment in column_segments:
+                y1, y2 = self.segments[segment * 4 + 1], self.segments[segment * 4 + 3]
+                lows.append(min(y1, y2))
+                max_high = max(max_high, y1, y2)
+                max_highs.append(max_high)
+            self.columns[column] = (array('l', column_segments), lows, max_highs)
+
+    @staticmethod
+    def get_segments(collider: Collider):
+        if collider.type == 'static':
+            # a horizontal segment, the top of the rectangle
+            x = collider.pos.x
+            y = collider.pos.y
+            return [(x, y, x + collider.shape.w, y)]
+
+        if collider.type == 'ramp':
+            # vertical edges are never the closest surface
+            return [(edge.p1.x, edge.p1.y, edge.p2.x, edge.p2.y) for edge in collider.shape.edges]
+
+        return []
+
+    def get_surface_below(self, x: float, y: float, max_top: float = float('inf')):
+        """Returns the y of the closest surface strictly below the point, or inf if there is none.
+        Surfaces of colliders whose top is below max_top are ignored."""
+        column = self.columns.get(math.floor(x / self.column_width), None)
+        if column is None:
+            return float('inf')
+
+        column_segments, lows, max_highs = column
+        segments = self.segments
+        closest = float('inf')
+        for i in range(bisect.bisect_right(max_highs, y), len(lows)):
+            if lows[i] >= closest:
+                break
+
+            segment = column_segments[i]
+            offset = segment * 4
+            x1 = segments[offset]
+            x2 = segments[offset + 2]
+            if not (x1 <= x <= x2 or x2 <= x <= x1) or self.tops[segment] > max_top:
+                continue
+
+            y1 = segments[offset + 1]
+            y2 = segments[offset + 3]
+
+            if y1 == y2:
+                surface_y = y1
+            else:
+                t = (x - x1) / (x2 - x1)
+                surface_y = y1 + t * (y2 - y1)
+
+            if y < surface_y < closest:
+                closest = surface_y
+
+        return closest
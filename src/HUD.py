@@ -1,5 +1,6 @@
 import pygame, os, math
 from src import config
+from src.Assets import assets
 from src.Item import Item
 from src.utils import color_gradient, resource_path
 
@@ -8,8 +9,7 @@ class HUD:
     def __init__(self, game):
         self.game = game
         game_scale = game.settings.get_scale()
-        hud = pygame.image.load(os.path.join(config.assets_folder, 'graphics', 'hud.png')).convert_alpha()
-        self.hud = pygame.transform.scale(hud, (hud.get_width() / 2 * game_scale, hud.get_height() / 2 * game_scale))
+        self.hud = assets.get_image(os.path.join('graphics', 'hud.png'), game_scale / 2)
 
         font_path = resource_path(os.path.join('assets', 'console.ttf'))
         self.font = pygame.font.Font(font_path, int(8 * game_scale))
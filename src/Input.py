@@ -16,6 +16,9 @@ class Input:
     SWITCH_WEAPON = 'switch_weapon'
     ANY = '*'
 
+    # inputs that control the player, in a fixed order (e.g. for replays)
+    PLAYER_ACTIONS = (LEFT, RIGHT, UP, DOWN, JUMP, WALL_JUMP, SHOOT, SWITCH_WEAPON)
+
 DEFAULT_INPUT = {
     Input.CONTROLLER: {
         Input.UP: {'axis': 1, 'value': -1},
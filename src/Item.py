@@ -4,32 +4,40 @@ from src import config
 
 def pre_load_items(SCALE:int = 1):
     for item in ['rocket', 'plasma']:
+        if config.headless:
+            Item.types[item] = None
+            continue
         Item.types[item] = pygame.image.load(os.path.join(config.assets_folder, 'graphics', f'item_{item}.png')).convert_alpha()
         if SCALE != 1:
             Item.types[item] = pygame.transform.scale(Item.types[item], (Item.types[item].get_width() * SCALE, Item.types[item].get_height() * SCALE))
 
 class Item:
+    """Item class for items that can be picked up"""
+
+    __slots__ = ('type', 'pos', 'ammo', 'stay', 'width', 'height', 'picked_up', 'respawn_at', 'anim_frame', 'anim_timer', 'anim_dir', 'sprite', 'bbox')
 
     types = {}
 
-    """Item class for items that can be picked up"""
     def __init__(self, type: str, pos: Vector2, width=16, height=16, ammo: int = 0, stay: bool = False):
         self.type = type
         self.pos: Vector2 = pos
         self.ammo: int = ammo
-        self.picked_up: bool = False
         self.stay: bool = stay
-        self.respawn_at = None
-        self.anim_frame = 0
-        self.anim_timer = random.randint(0, 250)
-        self.anim_dir = 1
         self.width = width
         self.height = height
+        self.reset()
 
         self.sprite = Item.types[type]
 
         self.bbox = (self.pos.x, self.pos.y, self.pos.x + self.width, self.pos.y + self.height)
 
+    def reset(self):
+        self.picked_up: bool = False
+        self.respawn_at = None
+        self.anim_frame = 0
+        self.anim_timer = random.randint(0, 250)
+        self.anim_dir = 1
+
     def draw(self, surface, camera):
         if self.picked_up:
             return
@@ -48,5 +56,5 @@ class Item:
             self.anim_timer = 0
             self.anim_frame += self.anim_dir
 
-        view_pos = camera.to_view_space(Vector2(self.pos.x, self.pos.y))
+        view_pos = camera.to_view_space(self.pos, camera.view_pos)
         surface.blit(self.sprite, (view_pos.x, view_pos.y - self.anim_frame))
\ No newline at end of file
@@ -1,6 +1,7 @@
 import os, pygame
 
 from src import config
+from src.Assets import assets
 from src.GameObject import GameObject
 from src.SimpleRect import SimpleRect
 from src.Vector2 import Vector2
@@ -17,22 +18,25 @@ class JumpPad(GameObject):
         self.vel = vel
         self.pos.x += self.shape.w // 2 + (32 * scale)
         self.pos.y += self.shape.h
-        sprite = pygame.image.load(os.path.join(config.assets_folder, 'graphics', 'jumppad.png')).convert_alpha()
-        new_size = (sprite.get_width() / 2 * scale, sprite.get_height() / 2 * scale)
-        self.sprite = pygame.transform.smoothscale(sprite, new_size)
-        self.sound = pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'jumppad.mp3'))
+        self.sprite = None
+        if not config.headless:
+            self.sprite = assets.get_image(os.path.join('graphics', 'jumppad.png'), scale / 2, smooth=True)
+        self.sound = assets.get_sound(os.path.join('sounds', 'jumppad.mp3'))
 
         self.bbox = (self.pos.x, self.pos.y, self.pos.x + self.shape.w, self.pos.y + self.shape.w)
 
+    def reset(self):
+        self.jumped_at = float("-inf")
+
     def draw(self, surface: pygame.Surface, camera):
 
-        view_pos = camera.to_view_space(self.pos)
+        view_pos = camera.to_view_space(self.pos, camera.view_pos)
         surface.blit(self.sprite, (view_pos.x, view_pos.y, self.shape.w, self.shape.h))
 
     def jump(self, player):
-        if self.jumped_at + 1000 < pygame.time.get_ticks():
+        if self.jumped_at + 1000 < config.ticks:
             player.action_states.on_event('jump')
-            self.jumped_at = pygame.time.get_ticks()
+            self.jumped_at = config.ticks
             self.sound.play()
             player.vel.x += self.vel.x
             player.vel.y = -self.vel.y
@@ -1,6 +1,7 @@
 import copy, os, pygame, random, yaml, webbrowser
 from datetime import date
 from src import config
+from src.Assets import assets
 from src.Game import Game
 from src.Input import Input
 from src.Settings import Settings
@@ -92,9 +93,9 @@ class MainMenu(GameScene):
         self.quit = False
         self.quit_really = False
         self.selected_item = 0
-        self.select = pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'menu', 'select.wav'))
-        self.back = pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'menu', 'back.wav'))
-        self.ok = pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'menu', 'ok.wav'))
+        self.select = assets.get_sound(os.path.join('sounds', 'menu', 'select.wav'))
+        self.back = assets.get_sound(os.path.join('sounds', 'menu', 'back.wav'))
+        self.ok = assets.get_sound(os.path.join('sounds', 'menu', 'ok.wav'))
         self.next_scene: GameScene|None = None
         self.active_mapping = None
         self.input_mappings = None
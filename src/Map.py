@@ -1,7 +1,10 @@
-import os.path, pygame, yaml
-from pyqtree import Index as QuadTree
+import math, os.path, pygame
+from src.ActiveSet import ActiveSet
+from src.Broadphase import Broadphase
+from src.CompiledMap import CompiledMap, WALL_TYPES
 from src.Decal import Decal
 from src.FinishLine import FinishLine
+from src.GroundProfile import GroundProfile
 from src.JumpPad import JumpPad
 from src.Portal import Portal
 from src.StartLine import StartLine
@@ -10,12 +13,45 @@ from src.Triangle import Triangle
 from src.Rectangle import Rectangle
 from src.Collider import Collider
 from src.Item import Item
-from src.Projectile import Projectile
-from src.Texture import Texture
+from src.SpatialIndex import SpatialIndex
+from src.SpatialIndexQuadTree import SpatialIndexQuadTree
+from src.SpatialIndexStrip import SpatialIndexStrip
+from src.ProjectilePool import ProjectileHit, ProjectilePool
+from src.RleSurface import RleSurface
+from src.RampSegments import RampSegments
 from src.Player import Player
-from src import config
+from src import config, sounds
+
+def create_spatial_index(name: str, bbox: tuple, scale: float):
+    if name == 'quadtree':
+        return SpatialIndexQuadTree(bbox)
+
+    if name == 'strip':
+        return SpatialIndexStrip(Map.SPATIAL_INDEX_COLUMN_WIDTH * scale)
+
+    raise Exception(f'Invalid spatial index: {name}')
 
 class Map:
+    # attribute with the active objects of each type (see ActiveSet)
+    BUCKETS = {
+        'static': 'static_colliders',
+        'wall': 'wall_colliders',
+        'ramp': 'ramp_colliders',
+        'death': 'death_colliders',
+        'deco': 'decoration',
+        Item: 'items',
+        Portal: 'portals',
+        JumpPad: 'jump_pads',
+    }
+    # the active objects only change when the camera moves into another cell of this size (scaled)
+    ACTIVE_CELL_SIZE = 256
+    # width of the columns of the ground profile (scaled)
+    GROUND_COLUMN_WIDTH = 64
+    # width of the columns of the broadphase (scaled)
+    BROADPHASE_COLUMN_WIDTH = 128
+    # width of the columns of the strip spatial index (scaled)
+    SPATIAL_INDEX_COLUMN_WIDTH = 512
+
     def __init__(self, game):
 
         self.game = game
@@ -36,7 +72,7 @@ class Map:
         self.death_colliders = []
         self.dynamic_colliders = []
         self.decoration = []
-        self.projectiles: list[Projectile] = []
+        self.projectiles = ProjectilePool()
         self.decals: list[Decal] = []
         self.items = []
         self.last_decal_velocity: int = 0
@@ -45,8 +81,12 @@ class Map:
         self.portals = []
         self.jump_pads = []
 
-        self.tree: QuadTree|None = None
-        self.filtered_objects = []
+        self.index: SpatialIndex|None = None
+        self.active_set: ActiveSet|None = None
+        self.ground_profile: GroundProfile|None = None
+        self.broadphase: Broadphase|None = None
+        self.ramp_segments: RampSegments|None = None
+        self.objects = []
 
         self.start_line: StartLine|None = None
         self.finish_line: FinishLine | None = None
@@ -58,135 +98,77 @@ class Map:
 
         self.map_name = map_name
 
-        self.static_colliders = []
-        self.ramp_colliders = []
-        self.wall_colliders = []
-        self.death_colliders = []
         self.dynamic_colliders = []
-        self.projectiles = []
-        self.items = []
+        self.projectiles.clear()
         self.last_decal_velocity = 0
 
         self.map_folder = os.path.join(config.assets_folder, 'maps', self.map_name)
 
         SCALE = self.game.settings.get_scale()
 
-        map_file = os.path.join(self.map_folder, 'map.yaml')
-        with open(map_file, 'r') as file:
-            data = yaml.safe_load(file)
+        compiled = CompiledMap.load(self.map_name, SCALE)
+        meta = compiled.meta
 
-        spawnpoint = data.get('player_spawnpoint', None)
+        spawnpoint = meta.get('player_start', None)
         if spawnpoint is not None:
-            self.player_start = Vector2(spawnpoint['x'] * SCALE, spawnpoint['y'] * SCALE)
+            self.player_start = Vector2(*spawnpoint)
 
         self.game.camera.pos = Vector2(self.player_start.x - 50, self.player_start.y - 200 * SCALE)
 
-        start_line = data.get('start_line', None)
+        start_line = meta.get('start_line', None)
         if start_line is not None:
-            self.start_line = StartLine(Vector2(start_line['x'] * SCALE, start_line['y'] * SCALE), scale=SCALE)
+            self.start_line = StartLine(Vector2(*start_line), scale=SCALE)
 
-        finish_line = data.get('finish_line', None)
+        finish_line = meta.get('finish_line', None)
         if finish_line is not None:
-            self.finish_line = FinishLine(Vector2(finish_line['x'] * SCALE, finish_line['y'] * SCALE))
-
-        min_x = float("inf")
-        max_x = float("-inf")
-        min_y = float("inf")
-        max_y = float("-inf")
-
-        items = data.get('items', None)
-        if items is not None:
-            for item in items:
-                min_x = min(item['x'] * SCALE, min_x)
-                max_x = max(item['x'] * SCALE, max_x)
-                min_y = min(item['y'] * SCALE, min_y)
-                max_y = max(item['y'] * SCALE, max_y)
-                self.items.append(Item(item['type'], Vector2(item['x'] * SCALE, item['y'] * SCALE + 12 * SCALE), 16 * SCALE, 16 * SCALE, item['ammo'], item['stay']))
-
-        portals = data.get('portals', None)
-        if portals is not None:
-            for portal in portals:
-                min_x = min(portal['entry_x'] * SCALE, portal['exit_x'] * SCALE, min_x)
-                max_x = max(portal['entry_x'] * SCALE, portal['entry_x'] * SCALE, max_x)
-                min_y = min(portal['entry_y'] * SCALE, portal['entry_y'] * SCALE, min_y)
-                max_y = max(portal['entry_y'] * SCALE, portal['entry_y'] * SCALE, max_y)
-                self.portals.append(Portal(Vector2(portal['entry_x'] * SCALE, portal['entry_y'] * SCALE), portal['entry_flipped'], Vector2(portal['exit_x'] * SCALE, portal['exit_y'] * SCALE), portal['exit_flipped'], self.game.settings))
-
-        jump_pads = data.get('jump_pads', None)
-        if jump_pads is not None:
-            for jump_pad in jump_pads:
-                min_x = min(jump_pad['x'] * SCALE, min_x)
-                max_x = max(jump_pad['x'] * SCALE, max_x)
-                min_y = min(jump_pad['y'] * SCALE, min_y)
-                max_y = max(jump_pad['y'] * SCALE, max_y)
-                self.jump_pads.append(JumpPad(Vector2(jump_pad['x'] * SCALE, jump_pad['y'] * SCALE), Vector2(jump_pad['vel_x'] * SCALE, jump_pad['vel_y'] * SCALE), SCALE))
-
-        rectangles = data.get('rectangles', None)
-        if rectangles is not None:
-            for rect in rectangles:
-
-                min_x = min(rect['x'] * SCALE, min_x)
-                max_x = max(rect['x'] * SCALE + rect['w'] * SCALE, max_x)
-                min_y = min(rect['y'] * SCALE, min_y)
-                max_y = max(rect['y'] * SCALE + rect['h'] * SCALE, max_y)
-
-                texture = None
-                texture_path = rect.get('texture', None)
-                if texture_path is not None:
-                    texture = Texture(os.path.join(self.map_folder, rect['texture']), rect.get('texture_scale', 1) * SCALE, rect.get('texture_offset_x', 0) * SCALE, rect.get('texture_offset_y', 0) * SCALE, rect.get('texture_rotation', 0))
-                collider = Collider(Rectangle(Vector2(rect['x'] * SCALE, rect['y'] * SCALE), int(rect['w'] * SCALE), int(rect['h'] * SCALE), texture), rect['wall_type'])
-                if rect['wall_type'] == 'static':
-                    self.static_colliders.append(collider)
-                elif rect['wall_type'] == 'wall':
-                    self.wall_colliders.append(collider)
-                elif rect['wall_type'] == 'deco':
-                    self.decoration.append(collider)
-                elif rect['wall_type'] == 'death':
-                    self.death_colliders.append(collider)
-
-        triangles = data.get('triangles', None)
-        if triangles is not None:
-            for triangle in triangles:
-                texture = None
-                texture_path = triangle.get('texture', None)
-                if texture_path is not None:
-                    texture = Texture(os.path.join(self.map_folder, triangle['texture']), triangle.get('texture_scale', 1) * SCALE, triangle.get('texture_offset_x', 0) * SCALE, triangle.get('texture_offset_y', 0) * SCALE, triangle.get('texture_rotation', 0))
-                points = triangle.get('points', None)
-                for p in points:
-                    min_x = min(p['x'] * SCALE, min_x)
-                    max_x = max(p['x'] * SCALE, max_x)
-                    min_y = min(p['y'] * SCALE, min_y)
-                    max_y = max(p['y'] * SCALE, max_y)
-                collider = Collider(Triangle(Vector2(points[0]['x'] * SCALE, points[0]['y'] * SCALE), Vector2(points[1]['x'] * SCALE, points[1]['y'] * SCALE), Vector2(points[2]['x'] * SCALE, points[2]['y'] * SCALE), texture), 'ramp')
-                if triangle['wall_type'] == 'ramp':
-                    self.ramp_colliders.append(collider)
-
-        ####################################
-        ### store everything in quadtree ###
-        ####################################
-
-        #print("min_x:", min_x, "max_x:", max_x, "min_y:", min_y, "max_y:", max_y)
-        self.tree = QuadTree(bbox=(min_x, min_y, max_x, max_y))
+            self.finish_line = FinishLine(Vector2(*finish_line))
 
-        for item in self.items:
-            self.tree.insert(item, item.bbox)
-        self.items = []
+        items = []
+        for item_type, x, y, width, height, ammo, stay in meta['items']:
+            items.append(Item(item_type, Vector2(x, y), width, height, ammo, stay))
 
-        for portal in self.portals:
-            self.tree.insert(portal,portal.bbox)
-        self.portals = []
+        portals = []
+        for entry_x, entry_y, entry_flipped, exit_x, exit_y, exit_flipped in meta['portals']:
+            portals.append(Portal(Vector2(entry_x, entry_y), entry_flipped, Vector2(exit_x, exit_y), exit_flipped, self.game.settings))
 
-        for jump_pad in self.jump_pads:
-            self.tree.insert(jump_pad, jump_pad.bbox)
-        self.jump_pads = []
+        jump_pads = []
+        for x, y, vel_x, vel_y in meta['jump_pads']:
+            jump_pads.append(JumpPad(Vector2(x, y), Vector2(vel_x, vel_y), SCALE))
 
-        for collider in self.static_colliders + self.wall_colliders + self.decoration + self.death_colliders:
-            self.tree.insert(collider, collider.shape.bbox)
-        self.static_colliders = self.wall_colliders = self.decoration = self.death_colliders = []
+        colliders_by_type = {wall_type: [] for wall_type in WALL_TYPES}
+        for i, (x, y, w, h) in enumerate(compiled.rects):
+            wall_type = WALL_TYPES[compiled.rect_types[i]]
+            colliders_by_type[wall_type].append(Collider(Rectangle(Vector2(x, y), w, h, surface=compiled.get_rect_surface(i)), wall_type))
 
-        for collider in self.ramp_colliders:
-            self.tree.insert(collider, collider.shape.bbox)
-        self.ramp_colliders = []
+        ramp_colliders = []
+        for i, (x1, y1, x2, y2, x3, y3) in enumerate(compiled.triangles):
+            ramp_colliders.append(Collider(Triangle(Vector2(x1, y1), Vector2(x2, y2), Vector2(x3, y3), surface=compiled.get_triangle_surface(i)), 'ramp'))
+
+        #########################################
+        ### store everything in spatial index ###
+        #########################################
+
+        self.index = create_spatial_index(meta['spatial_index'], compiled.bbox, SCALE)
+        self.active_set = ActiveSet(self.index, list(self.BUCKETS.values()), self.ACTIVE_CELL_SIZE * SCALE)
+
+        # keep all objects in load order, so they can be referenced by index (e.g. in replay keyframes)
+        self.objects = items + portals + jump_pads + colliders_by_type['static'] + colliders_by_type['wall'] + colliders_by_type['deco'] + colliders_by_type['death'] + ramp_colliders
+
+        self.broadphase = Broadphase(self.active_set, self.BROADPHASE_COLUMN_WIDTH * SCALE)
+        for object in self.objects:
+            if isinstance(object, Collider):
+                self.active_set.insert(object, object.shape.bbox, self.BUCKETS[object.type])
+                self.broadphase.insert(object, object.shape.bbox, self.BUCKETS[object.type])
+            else:
+                self.active_set.insert(object, object.bbox, self.BUCKETS[type(object)])
+                self.broadphase.insert(object, self.get_collision_bbox(object), self.BUCKETS[type(object)])
+
+        # the active objects are the buckets of the active set, which are updated in place
+        for name, bucket in self.active_set.buckets.items():
+            setattr(self, name, bucket)
+
+        self.ramp_segments = RampSegments(ramp_colliders)
+        self.ground_profile = GroundProfile([object for object in self.objects if isinstance(object, Collider)], self.GROUND_COLUMN_WIDTH * SCALE)
 
         #for item in data.get('player_items', []):
         #    if item['type'] == 'plasma':
@@ -200,7 +182,21 @@ class Map:
         #        player.animation.select_rocket()
         #        player.active_weapon = 'rocket'
 
-        sky = data.get('sky', None)
+        # backgrounds are only needed for rendering
+        if config.headless:
+            return
+
+        if config.rle_surfaces:
+            # colliders with the same texture share their surface (see CompiledMap), so also its RLE surface
+            rle_surfaces = {}
+            for object in self.objects:
+                if isinstance(object, Collider) and object.shape.surface is not None:
+                    surface = object.shape.surface
+                    if surface not in rle_surfaces:
+                        rle_surfaces[surface] = RleSurface(surface, self.game.surface)
+                    object.shape.rle_surface = rle_surfaces[surface]
+
+        sky = meta['sky']
         if sky is not None:
             sky_path = os.path.join(self.map_folder, sky)
             if os.path.isfile(sky_path):
@@ -209,7 +205,7 @@ class Map:
                 height = int(width * self.sky.get_height() / self.sky.get_width())
                 self.sky = pygame.transform.scale(self.sky, (width, height))
 
-        parallax_1 = data.get('parallax_1', None)
+        parallax_1 = meta['parallax_1']
         if parallax_1 is not None:
             parallax_1_path = os.path.join(self.map_folder, parallax_1)
             if os.path.isfile(parallax_1_path):
@@ -218,7 +214,7 @@ class Map:
                 height = int(self.parallax_1_width * self.parallax_1.get_height() / self.parallax_1.get_width())
                 self.parallax_1 = pygame.transform.scale(self.parallax_1, (self.parallax_1_width, height))
 
-        parallax_2 = data.get('parallax_2', None)
+        parallax_2 = meta['parallax_2']
         if parallax_2 is not None:
             parallax_2_path = os.path.join(self.map_folder, parallax_2)
             if os.path.isfile(parallax_2_path):
@@ -228,107 +224,137 @@ class Map:
                 self.parallax_2 = pygame.transform.scale(self.parallax_2, (self.parallax_2_width, height))
 
     def reset(self):
+        """Restarts the run on the loaded map. Only the state that changes during a run is reset,
+        the colliders, their surfaces and the quadtree are kept."""
 
-        self.sky: pygame.image = None
-        self.parallax_1: pygame.image = None
-        self.parallax_1_width: int | None = None
-        self.parallax_1_offset: int = 0
-        self.parallax_2: pygame.image = None
-        self.parallax_2_width: int | None = None
-        self.parallax_2_offset: int = 0
+        self.parallax_1_offset = 0
+        self.parallax_2_offset = 0
 
-        self.static_colliders = []
-        self.ramp_colliders = []
-        self.wall_colliders = []
-        self.death_colliders = []
-        self.dynamic_colliders = []
-        self.decoration = []
-        self.projectiles: list[Projectile] = []
-        self.decals: list[Decal] = []
-        self.items = []
-        self.last_decal_velocity: int = 0
-        self.player_start: Vector2 = Vector2(70, 70)
+        self.projectiles.clear()
+        self.decals = []
+        self.last_decal_velocity = 0
 
-        self.portals = []
-        self.jump_pads = []
+        for object in self.objects:
+            if isinstance(object, (Item, Portal, JumpPad)):
+                object.reset()
 
-        self.tree: QuadTree | None = None
-        self.filtered_objects = []
+        # the active objects are filled again by the next update
+        self.active_set.invalidate()
 
-        self.start_line: StartLine | None = None
-        self.finish_line: FinishLine | None = None
-        self.timer: int = 0
+        self.timer = 0
         self.timer_start = None
         self.timer_stop = None
 
-        self.load(self.map_name)
+        SCALE = self.game.settings.get_scale()
+        self.game.camera.pos = Vector2(self.player_start.x - 50, self.player_start.y - 200 * SCALE)
         self.game.camera.is_looking_ahead_y = True
 
-
     def start_timer(self):
-        self.timer_start = pygame.time.get_ticks()
+        self.timer_start = config.ticks
 
     def stop_timer(self):
-        self.timer_stop = pygame.time.get_ticks()
+        self.timer_stop = config.ticks
 
     def update(self, player: Player):
 
         if self.timer_start is not None and self.timer_stop is None:
-            self.timer = pygame.time.get_ticks() - self.timer_start
+            self.timer = config.ticks - self.timer_start
 
-        # filter objects from quadtree in each frame
-        self.static_colliders = []
-        self.wall_colliders = []
-        self.ramp_colliders = []
-        self.death_colliders = []
-        self.decoration = []
-        self.items = []
-        self.portals = []
-        self.jump_pads = []
+        self.update_active_objects()
+        self.game.profiler.lap('map_query')
 
-        # extend the boundary to the bottom extremely (42) so we can always find the distance to the collider below
-        boundary = (self.game.camera.pos.x, self.game.camera.pos.y, self.game.camera.pos.x + self.game.camera.w, self.game.camera.pos.y + self.game.camera.h * 42)
-        self.filtered_objects = self.tree.intersect(boundary)
-        for object in self.filtered_objects:
-            if isinstance(object, Collider):
-                if object.type == 'static':
-                    self.static_colliders.append(object)
-                elif object.type == 'wall':
-                    self.wall_colliders.append(object)
-                elif object.type == 'ramp':
-                    self.ramp_colliders.append(object)
-                elif object.type == 'death':
-                    self.death_colliders.append(object)
-                elif object.type == 'deco':
-                    self.decoration.append(object)
-            elif isinstance(object, Item):
-                self.items.append(object)
-            elif isinstance(object, Portal):
-                self.portals.append(object)
-            elif isinstance(object, JumpPad):
-                self.jump_pads.append(object)
-
-        for i in range(len(self.projectiles) - 1, -1, -1):
-            # projectile can produce a decal (e.g. on hit with wall)
-            decal = self.projectiles[i].update(self)
-            if decal:
-                del self.projectiles[i]
-                if isinstance(decal, Decal):
-                    self.decals.append(decal)
+        # projectiles produce a decal when they hit (e.g. a wall)
+        for hit in self.projectiles.update(self):
+            self.decals.append(self.apply_projectile_hit(hit))
+        self.game.profiler.lap('projectiles')
 
         for i in range(len(self.decals) - 1, -1, -1):
             if self.decals[i].is_expired():
                 del self.decals[i]
+        self.game.profiler.lap('decals')
+
+    def get_ramp_radians(self):
+        """Returns the distinct angles of the ramps the player can stand on"""
+        return sorted({side.radians for _, side in self.ramp_segments.sides})
+
+    def apply_projectile_hit(self, hit: ProjectileHit):
+        """Plays the sound of the hit and pushes the player, returns the decal"""
+        player = self.game.player
+        distance = math.sqrt((player.pos.x - hit.x) ** 2 + (player.pos.y - hit.y) ** 2)
+        if hit.type == 'rocket':
+            sounds.rocket.set_volume(ProjectilePool.volume_for_distance(distance))
+            sounds.rocket.play()
+            player.add_rocket_velocity(distance, math.atan2(player.pos.y - hit.y, player.pos.x - hit.x + config.ROCKET_DOWN_OFFSET_X))
+            return Decal('rocket', 500, hit.x, hit.y, center=True, fade_out=True)
+
+        if hit.collider.type == 'wall':
+            player.add_plasma_velocity(distance, math.atan2(player.pos.y - hit.y, player.pos.x - hit.x))
+        return Decal('plasma', 1000, hit.x, hit.y, center=False, fade_out=True)
+
+    def update_active_objects(self):
+        # extend the boundary to the bottom extremely (42) so we can always find the distance to the collider below
+        camera = self.game.camera
+        self.active_set.update(camera.pos.x, camera.pos.y, camera.pos.x + camera.w, camera.pos.y + camera.h * 42)
+
+    @staticmethod
+    def get_collision_bbox(object):
+        """The area the player collides with, which is not always the bbox (e.g. the bbox of a portal spans
+        from its entry to its exit)"""
+        if isinstance(object, Item):
+            # see Player.item_collisions
+            return object.pos.x - object.width, object.pos.y - object.height, object.pos.x + object.width, object.pos.y + object.height
+        return object.pos.x, object.pos.y, object.pos.x + object.shape.w, object.pos.y + object.shape.h
+
+    def get_state(self):
+        """Returns a json serializable snapshot of the map objects that change during a run"""
+        return {
+            'timer': [self.timer, self.timer_start, self.timer_stop],
+            'items': [[item.picked_up, item.respawn_at] for item in self.objects if isinstance(item, Item)],
+            'jump_pads': [jump_pad.jumped_at for jump_pad in self.objects if isinstance(jump_pad, JumpPad)],
+            'projectiles': self.projectiles.get_state(),
+        }
+
+    def set_state(self, state):
+        self.timer, self.timer_start, self.timer_stop = state['timer']
+
+        for item, (picked_up, respawn_at) in zip([item for item in self.objects if isinstance(item, Item)], state['items']):
+            item.picked_up = picked_up
+            item.respawn_at = respawn_at
+
+        for jump_pad, jumped_at in zip([jump_pad for jump_pad in self.objects if isinstance(jump_pad, JumpPad)], state['jump_pads']):
+            jump_pad.jumped_at = jumped_at
+
+        self.projectiles.set_state(state['projectiles'])
+        self.decals = []
+
+        self.update_active_objects()
 
     def draw(self):
+        profiler = self.game.profiler
         self.game.surface.fill(config.BACKGROUND_COLOR)
         self.draw_sky()
+        profiler.lap('draw_sky')
         self.draw_parallax_2()
         self.draw_parallax_1()
+        profiler.lap('draw_parallax')
+        self.draw_colliders()
+        profiler.lap('draw_colliders')
+        self.draw_entities()
+        profiler.lap('draw_entities')
+
+        #print("num objects", len(self.filtered_objects))
 
-        for collider in self.static_colliders + self.wall_colliders + self.ramp_colliders + self.death_colliders + self.decoration:
-            collider.shape.draw(self.game.surface, self.game.camera)
+        self.draw_decals()
+        profiler.lap('draw_decals')
+        self.draw_projectiles()
+        profiler.lap('draw_projectiles')
 
+    def draw_colliders(self):
+        for colliders in (self.static_colliders, self.wall_colliders, self.ramp_colliders, self.death_colliders, self.decoration):
+            for collider in colliders:
+                collider.shape.draw(self.game.surface, self.game.camera)
+
+    def draw_entities(self):
         for item in self.items:
             item.draw(self.game.surface, self.game.camera)
 
@@ -343,11 +369,6 @@ class Map:
         if self.finish_line:
             self.finish_line.draw_back(self.game.surface, self.game.camera)
 
-        #print("num objects", len(self.filtered_objects))
-
-        self.draw_decals()
-        self.draw_projectiles()
-
     def draw_front(self):
         if self.start_line:
             self.start_line.draw_front(self.game.surface, self.game.camera)
@@ -388,8 +409,7 @@ class Map:
             self.game.surface.blit(self.parallax_2, (x, offset_y))
 
     def draw_projectiles(self):
-        for projectiles in self.projectiles:
-            projectiles.draw(self.game.surface, self.game.camera)
+        self.projectiles.draw(self.game.surface, self.game.camera)
 
     def draw_decals(self):
         for decal in self.decals:
@@ -1,15 +1,19 @@
-import copy, math, pygame, random, os
+import math, pygame, random, os
 from src.Animation import Animation
 from src.Decal import Decal
 from src.Entity import Entity
 from src.Rectangle import Rectangle
+from src.RotationCache import RotationCache
 from src.StateMachine import StateMachine
 from src.State import State
 from src.Vector2 import Vector2
-from src.Projectile import Projectile
-from src import sounds, config
+from src import sounds, config, utils
 
 class Player(Entity):
+
+    # sprites with a copy for the motion blur, the copies are dropped when there are more
+    MAX_BLUR_GHOSTS = 64
+
     def __init__(self, game):
 
         self.game = game
@@ -36,6 +40,8 @@ class Player(Entity):
         self.last_boost_time = None
         self.num_boost_ghosts = None
         self.boost_blur_elapsed = 0.0
+        # one copy per sprite drawn as motion blur ghost, its alpha is changed for each ghost
+        self.blur_ghosts: dict[pygame.Surface, pygame.Surface] = {}
         self.acceleration = 0
         self.map = None
         self.last_walljump = 0
@@ -84,7 +90,9 @@ class Player(Entity):
 
         self.action_states = StateMachine(self.Idle_State(), self)
         self.animation = Animation(self)
-        self.height = self.animation.sprite_sheet.get_height() * self.P_SCALE
+        self.rotation_cache = RotationCache()
+        if self.animation.atlas is not None:
+            self.height = self.animation.atlas.sheet_height * self.P_SCALE
 
     def reset(self):
         self.distance_to_ground = 0
@@ -144,7 +152,38 @@ class Player(Entity):
 
     def set_map(self, map):
         self.map = map
-        self.shape.pos = map.player_start
+        # copy, so moving the player never moves the spawn point of the map
+        self.shape.pos = Vector2(map.player_start.x, map.player_start.y)
+
+        if self.animation.atlas is not None:
+            self.rotation_cache.prewarm(self.animation.get_ramp_frames(), [math.degrees(radians) for radians in map.get_ramp_radians()])
+
+    def get_state(self):
+        """Returns a json serializable snapshot of everything that affects the simulation of the player"""
+        state = self.action_states.state
+        return {
+            'values': utils.get_plain_values(self, exclude=('height',)),
+            'pos': [self.pos.x, self.pos.y],
+            'vel': [self.vel.x, self.vel.y],
+            'height': self.shape.h,
+            'ground_touch_pos': None if self.ground_touch_pos is None else [self.ground_touch_pos.x, self.ground_touch_pos.y],
+            'ground_collider': None if self.ground_collider is None else self.map.objects.index(self.ground_collider),
+            'action_state': [state.__class__.__name__, utils.get_plain_values(state)],
+            'animation': utils.get_plain_values(self.animation, exclude=('atlas', 'current_sprite')),
+        }
+
+    def set_state(self, state):
+        utils.set_plain_values(self, state['values'])
+        self.pos.x, self.pos.y = state['pos']
+        self.vel.x, self.vel.y = state['vel']
+        self.shape.h = state['height']
+        self.ground_touch_pos = None if state['ground_touch_pos'] is None else Vector2(*state['ground_touch_pos'])
+        self.ground_collider = None if state['ground_collider'] is None else self.map.objects[state['ground_collider']]
+
+        state_name, state_values = state['action_state']
+        self.action_states.state = getattr(Player, state_name)()
+        utils.set_plain_values(self.action_states.state, state_values)
+        utils.set_plain_values(self.animation, state['animation'])
 
     def __getattr__(self, name):
         if name == 'current_action_state':
@@ -158,11 +197,13 @@ class Player(Entity):
         scale = self.game.settings.get_scale()
 
         #if camera.contains(self.rect):
-        view_pos_sprite = self.game.camera.to_view_space(
-            Vector2(
+        camera = self.game.camera
+        view_pos_sprite = camera.to_view_space(
+            camera.view_pos.set(
                 self.shape.pos.x - 16 * scale,
                 self.shape.pos.y - (32 * scale if self.crouching else 21 * scale)
-            )
+            ),
+            camera.view_pos
         )
 
         blur_factor = self.last_boost / 64 * scale * self.direction
@@ -175,9 +216,10 @@ class Player(Entity):
             #if self.direction == -1:
             #    rotation -= 180
 
-            rotated_sprite = pygame.transform.rotate(self.animation.current_sprite, rotation)
+            sprite = self.animation.current_sprite
+            rotated_sprite = self.rotation_cache.get(sprite, rotation, self.animation.frame_keys[sprite])
             rect = rotated_sprite.get_rect(center=(view_pos_sprite.x + self.animation.current_sprite.get_width() // 2, view_pos_sprite.y + self.animation.current_sprite.get_height() // 2))
-            self.motion_blur(Vector2(rect.topleft[0], rect.topleft[1]), rotated_sprite, blur_factor)
+            self.motion_blur(camera.view_pos.set(rect.topleft[0], rect.topleft[1]), rotated_sprite, blur_factor)
             self.game.surface.blit(rotated_sprite, rect.topleft)
 
         # debug draw rect around player
@@ -189,8 +231,8 @@ class Player(Entity):
             duration = 420
             remaining_time = max(0.0, duration - self.boost_blur_elapsed)
             inverse_percentage = remaining_time / duration
+            ghost = self.get_blur_ghost(sprite)
             for i in range(self.num_boost_ghosts):
-                ghost = sprite.copy()
                 alpha = 92 / (i + 1) * inverse_percentage
                 ghost.set_alpha(alpha)
                 self.game.surface.blit(ghost, (view_pos.x - i * blur_factor, view_pos.y))
@@ -198,10 +240,21 @@ class Player(Entity):
                 self.num_boost_ghosts = None
                 self.boost_blur_elapsed = 0
 
+    def get_blur_ghost(self, sprite):
+        """Returns the copy of the sprite for the motion blur, made once per sprite instead of once per ghost
+        and frame. The ghosts are drawn one after another, so they can share it."""
+        ghost = self.blur_ghosts.get(sprite, None)
+        if ghost is None:
+            if len(self.blur_ghosts) >= self.MAX_BLUR_GHOSTS:
+                self.blur_ghosts.clear()
+            ghost = sprite.copy()
+            self.blur_ghosts[sprite] = ghost
+        return ghost
+
     def input_wall_jump(self, key_pressed):
         if key_pressed:
-            if pygame.time.get_ticks() - self.last_walljump > 1000 and self.walljump_collisions():
-                self.last_walljump = pygame.time.get_ticks()
+            if config.ticks - self.last_walljump > 1000 and self.walljump_collisions():
+                self.last_walljump = config.ticks
                 self.action_states.on_event('walljump')
 
     def input_right(self, key_pressed):
@@ -232,7 +285,7 @@ class Player(Entity):
         self.pressed_jump = key_pressed
         if key_pressed:
             if self.jump_pressed_at is None:
-                self.jump_pressed_at = pygame.time.get_ticks()
+                self.jump_pressed_at = config.ticks
                 if not self.jump_action_distance and not self.last_ramp_radians:
                     self.jump_action_distance = self.distance_to_ground / self.game.settings.get_scale()
         else:
@@ -241,13 +294,13 @@ class Player(Entity):
             self.released_jump = True
 
     def input_switch_weapon(self, key_pressed):
-        if key_pressed and self.last_weapon_switch + 666 < pygame.time.get_ticks():
+        if key_pressed and self.last_weapon_switch + 666 < config.ticks:
             if self.active_weapon == 'rocket' and self.has_plasma:
                 self.active_weapon = 'plasma'
             elif self.active_weapon == 'plasma' and self.has_rocket:
                 self.active_weapon = 'rocket'
             self.animation.set_active_weapon()
-            self.last_weapon_switch = pygame.time.get_ticks()
+            self.last_weapon_switch = config.ticks
 
     def update(self):
 
@@ -295,9 +348,9 @@ class Player(Entity):
                 sounds.rocket_launch.play()
                 channel = sounds.rocket_fly.play(loops=-1)
                 if self.pressed_down:
-                    self.map.projectiles.append(Projectile('rocket', 1337000, self.pos.x + config.ROCKET_DOWN_OFFSET_X * scale, self.pos.y + config.ROCKET_DOWN_OFFSET_Y * scale, self.vel.x, self.vel.y + 1 * scale, 0.7 * scale, -0.0015 * scale, channel, ['ramp', 'static']))
+                    self.map.projectiles.spawn('rocket', 1337000, self.pos.x + config.ROCKET_DOWN_OFFSET_X * scale, self.pos.y + config.ROCKET_DOWN_OFFSET_Y * scale, self.vel.x, self.vel.y + 1 * scale, 0.7 * scale, -0.0015 * scale, channel, ['ramp', 'static'])
                 else:
-                    self.map.projectiles.append(Projectile('rocket', 1337000, self.pos.x + 30 * scale, self.pos.y + 5 * scale, self.vel.x + 1 * scale, 0, 1.1 * scale, -0.00075 * scale, channel, ['ramp', 'static']))
+                    self.map.projectiles.spawn('rocket', 1337000, self.pos.x + 30 * scale, self.pos.y + 5 * scale, self.vel.x + 1 * scale, 0, 1.1 * scale, -0.00075 * scale, channel, ['ramp', 'static'])
 
     def shoot_plasma(self):
         scale = self.game.settings.get_scale()
@@ -323,7 +376,7 @@ class Player(Entity):
                             y_offset = 3 * scale
 
                         self.action_states.on_event('plasma')
-                        self.map.projectiles.append(Projectile('plasma', 1000, self.pos.x - 0.5 * scale + x_offset, self.pos.y + y_offset, self.vel.x, self.vel.y, collide_with=['wall']))
+                        self.map.projectiles.spawn('plasma', 1000, self.pos.x - 0.5 * scale + x_offset, self.pos.y + y_offset, self.vel.x, self.vel.y, collide_with=['wall'])
                     else:
                         if self.pressed_left:
                             decal_offset = 5
@@ -349,7 +402,7 @@ class Player(Entity):
                         elif self.pressed_right:
                             self.vel.x -= 0.04 * scale
                 else:
-                    self.map.projectiles.append(Projectile('plasma', 10000, self.pos.x + 30 * scale * self.direction, self.pos.y + 2 * scale, self.vel.x + 3 * scale * self.direction))
+                    self.map.projectiles.spawn('plasma', 10000, self.pos.x + 30 * scale * self.direction, self.pos.y + 2 * scale, self.vel.x + 3 * scale * self.direction)
 
 
     def get_distance_to_collider_below(self):
@@ -368,6 +421,12 @@ class Player(Entity):
         player_x = self.shape.pos.x + self.shape.w / 2  # Player center x-coordinate
         player_bottom_y = self.shape.pos.y + self.shape.h  # Player bottom y-coordinate
 
+        # Look up the precomputed surfaces. Only the active colliders count, which are all colliders of the
+        # profile intersecting the active window, as long as the player is inside of it.
+        window = self.map.active_set.window if self.map.active_set is not None else None
+        if window is not None and window[0] <= player_x <= window[2] and window[1] <= player_bottom_y:
+            return self.map.ground_profile.get_surface_below(player_x, player_bottom_y, window[3]) - player_bottom_y
+
         min_distance = float('inf')
 
         # Check static colliders
@@ -384,26 +443,17 @@ class Player(Entity):
         # Check ramp colliders
         for collider in self.map.ramp_colliders:
             triangle = collider.shape
-            vertices = [triangle.p1, triangle.p2, triangle.p3]
-
-            # Find the horizontal range of the triangle
-            min_x = min(v.x for v in vertices)
-            max_x = max(v.x for v in vertices)
 
             # Only check triangles that are horizontally aligned with the player
-            if min_x <= player_x <= max_x:
+            if triangle.bbox[0] <= player_x <= triangle.bbox[2]:
                 # Find the y-coordinate on the triangle at the player's x-coordinate
-                # We need to find the line segment that contains player_x
-                for i in range(3):
-                    p1 = vertices[i]
-                    p2 = vertices[(i + 1) % 3]
+                # We need to find the (non-vertical) edge that contains player_x
+                for edge in triangle.edges:
+                    p1 = edge.p1
+                    p2 = edge.p2
 
                     # Check if player_x is between p1.x and p2.x
                     if (p1.x <= player_x <= p2.x) or (p2.x <= player_x <= p1.x):
-                        # Calculate the y-coordinate on the line at player_x
-                        if p1.x == p2.x:  # Vertical line
-                            continue
-
                         # Linear interpolation to find y
                         t = (player_x - p1.x) / (p2.x - p1.x)
                         y = p1.y + t * (p2.y - p1.y)
@@ -529,10 +579,12 @@ class Player(Entity):
             self.move_single_axis(0, self.vel.y)
 
     def move_single_axis(self, dx, dy):
+        start_x = self.pos.x
+        start_y = self.pos.y
         self.pos.x += dx * config.delta_time
         self.pos.y += dy * config.delta_time
 
-        self.collider_collisions(dx, dy)
+        self.collider_collisions(dx, dy, start_x, start_y)
         self.ramp_collisions()
         self.item_collisions()
         self.functional_collisions()
@@ -587,14 +639,22 @@ class Player(Entity):
         elif self.crouching and abs(self.vel.x) < 0.03:
             self.vel.x = 0
 
-    def collider_collisions(self, dx, dy):
+    def collider_collisions(self, dx, dy, start_x, start_y):
 
         # when currently colliding with a ramp, ignore static (rect) colliders
         # fixes weird warping, when running from a static collider onto a down-ramp
         if self.last_ramp_radians != 0:
             return
 
-        other_collider = self.shape.check_collisions(self.map.static_colliders)
+        other_collider = self.shape.check_collisions(self.get_candidates('static_colliders'))
+
+        # when moving fast, the player can pass through a thin collider within a tick
+        candidates = self.map.broadphase.query('static_colliders', min(start_x, self.pos.x), max(start_x, self.pos.x) + self.shape.w)
+        passed = self.shape.check_swept_collisions(candidates, start_x, start_y)
+        if passed is not None:
+            entry = self.shape.get_entry_distance(other_collider.shape, start_x, start_y) if other_collider is not None else None
+            if other_collider is None or (entry is not None and passed[1] < entry):
+                other_collider = passed[0]
 
         if other_collider is None:
             return
@@ -632,7 +692,7 @@ class Player(Entity):
             return
 
         # Get the line of the ramp we collided with (up or down)
-        ramp_collider = self.shape.check_triangle_top_sides_collision(self.map.ramp_colliders)
+        ramp_collider = self.map.ramp_segments.check_rectangle(self.shape, self.get_candidates('ramp_colliders'))
 
         if ramp_collider is None:
             # launch when leaving a ramp
@@ -645,28 +705,8 @@ class Player(Entity):
 
         self.game.camera.stop_settling(self)
 
-        # unordered points of the ramp line
-        point0 = ramp_collider[0]
-        point1 = ramp_collider[1]
-
-        # determine which is the start and which is the end point
-        if point0.x < point1.x:
-            left_point = point0
-            right_point = point1
-        else:
-            left_point = point1
-            right_point = point0
-
-        x_start, y_start = left_point.x, left_point.y
-        x_end, y_end = right_point.x, right_point.y
-
-        # get the angle from proper start and end points
-        dy = y_end - y_start
-        dx = x_end - x_start
-
-        next_rad = -math.atan2(dy, dx) # WHY - ???
-
-        print(self.last_ramp_radians, next_rad)
+        # precomputed angle of the ramp line
+        next_rad = ramp_collider.radians # WHY - ???
 
         # launch when sliding over the peak of a two-sided ramp
         if (self.direction == 1 and self.last_ramp_radians > 0 > next_rad) or (self.direction == - 1 and self.last_ramp_radians < 0 < next_rad):
@@ -678,10 +718,10 @@ class Player(Entity):
 
         # Calculate horizontal progress (progress ratio) across the ramp
         x = self.shape.pos.x + self.shape.w / 2  # Player center x
-        progress = max(0, min(1, (x - x_start) / dx))  # Clamp to [0,1]
+        progress = max(0, min(1, (x - ramp_collider.x_start) / ramp_collider.dx))  # Clamp to [0,1]
 
         # Linear interpolation from base y to top y
-        y_on_ramp = (1 - progress) * y_start + progress * y_end
+        y_on_ramp = (1 - progress) * ramp_collider.y_start + progress * ramp_collider.y_end
 
         # Set player's feet to ramp surface
         self.shape.pos.y = y_on_ramp - self.shape.h
@@ -696,7 +736,7 @@ class Player(Entity):
     def item_collisions(self):
         for item in self.map.items:
             if item.picked_up:
-                if item.stay and item.respawn_at is not None and pygame.time.get_ticks() > item.respawn_at:
+                if item.stay and item.respawn_at is not None and config.ticks > item.respawn_at:
                     item.picked_up = False
                     item.respawn_at = None
                 continue
@@ -711,22 +751,22 @@ class Player(Entity):
                     self.plasma_ammo += item.ammo
                 item.picked_up = True
                 if item.stay:
-                    item.respawn_at = pygame.time.get_ticks() + 3000
+                    item.respawn_at = config.ticks + 3000
                 self.animation.set_active_weapon()#
 
     def functional_collisions(self):
 
         scale = self.game.settings.get_scale()
 
-        portal = self.shape.check_center_collisions(self.map.portals, 20 * scale, -40)
+        portal = self.shape.check_center_collisions(self.get_center_candidates('portals', 20 * scale), 20 * scale, -40)
         if portal is not None:
             portal.teleport(self)
 
-        jump_pad = self.shape.check_center_collisions(self.map.jump_pads, 10 * scale, -20 * scale)
+        jump_pad = self.shape.check_center_collisions(self.get_center_candidates('jump_pads', 10 * scale), 10 * scale, -20 * scale)
         if jump_pad is not None:
             jump_pad.jump(self)
 
-        death = self.shape.check_collisions(self.map.death_colliders)
+        death = self.shape.check_collisions(self.get_candidates('death_colliders'))
         if death is not None:
             self.action_states.on_event('dead')
 
@@ -741,26 +781,30 @@ class Player(Entity):
                 self.map.stop_timer()
 
     def walljump_collisions(self):
-        wall_collider = self.shape.check_collisions(self.map.wall_colliders)
+        wall_collider = self.map.broadphase.find_overlap('wall_colliders', self.shape.pos.x, self.shape.pos.y, self.shape.w, self.shape.h)
 
         return wall_collider is not None
 
     def plasma_climb_collisions(self):
-        wall_collider = self.shape.check_center_collisions(self.map.wall_colliders)
+        wall_collider = self.map.broadphase.find_containing('wall_colliders', self.shape.pos.x + self.shape.w // 2, self.shape.pos.y + self.shape.h // 2)
 
         return wall_collider is not None
 
     def check_can_uncrouch(self):
+        """Returns True if the standing player would fit at the current position"""
         height = self.HEIGHT * self.game.settings.get_scale()
-        stand_rect = copy.copy(self.shape)
-        stand_rect.pos = copy.copy(self.shape.pos)
-        stand_rect.pos.y -= (height - self.shape.h)
-        stand_rect.h = height
-        for collider in self.map.static_colliders:
-            if collider.shape.overlaps(stand_rect):
-                return False
-
-        return True
+        stand_y = self.shape.pos.y - (height - self.shape.h)
+        return self.map.broadphase.find_overlap('static_colliders', self.shape.pos.x, stand_y, self.shape.w, height) is None
+
+    def get_candidates(self, bucket_name: str):
+        """Returns the active objects of a map bucket which may overlap the player (see Broadphase)"""
+        return self.map.broadphase.query(bucket_name, self.shape.pos.x, self.shape.pos.x + self.shape.w)
+
+    def get_center_candidates(self, bucket_name: str, less_x = 0):
+        """Returns the candidates for Rectangle.check_center_collisions, a negative less_x extends the area around the center"""
+        x = self.shape.pos.x + self.shape.w // 2
+        margin = max(0, -less_x)
+        return self.map.broadphase.query(bucket_name, x - margin, x + margin)
 
     def calculate_distance(self, pos1, pos2):
         """Calculates the Euclidean distance between two points."""
@@ -1,14 +1,42 @@
 import os, pygame
 
-from src import config
+from src import config, sounds
+from src.Assets import assets
 from src.GameObject import GameObject
 from src.Settings import Settings
 from src.SimpleRect import SimpleRect
 from src.Vector2 import Vector2
 
 
+def pre_load_portals(SCALE:int = 1):
+    """Cuts the frames of the portal entry and exit, as is and flipped, from the sprite sheet"""
+    width = 64 * SCALE
+    height = 64 * SCALE
+    # (column, row) of the entry frames in the sprite sheet, the exit frames are three rows below
+    frame_cells = [(0, 2), (3, 1), (2, 1), (1, 1), (0, 1), (3, 0), (2, 0), (1, 0), (0, 0)]
+    rects = {
+        'entry': [(column * width, row * height, width, height) for column, row in frame_cells],
+        'exit': [(column * width, (row + 3) * height, width, height) for column, row in frame_cells],
+    }
+
+    path = os.path.join('graphics', 'portal.png')
+    Portal.frames = {}
+    for name, frame_rects in rects.items():
+        if config.headless:
+            Portal.frames[name] = {False: [None] * len(frame_rects), True: [None] * len(frame_rects)}
+        else:
+            Portal.frames[name] = {flipped: [assets.get_region(path, SCALE / 2, rect, flipped, smooth=True) for rect in frame_rects] for flipped in (False, True)}
+
+    Portal.sound = assets.get_sound(os.path.join('sounds', 'teleport.mp3'))
+    Portal.sound.set_volume(1)
+
+
 class Portal(GameObject):
 
+    # the frames of the entry and exit by flipped, shared by all portals (see pre_load_portals)
+    frames = {}
+    sound = sounds.NullSound()
+
     def __init__(self, entry: Vector2, entry_flipped, exit: Vector2, exit_flipped, settings: Settings):
 
         self.settings = settings
@@ -16,30 +44,6 @@ class Portal(GameObject):
         self.WIDTH = 64 * SCALE
         self.HEIGHT = 64 * SCALE
         self.FRAME_TIME = 25
-        self.FRAMES_ENTRY = [
-            (0 * self.WIDTH, 2 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (3 * self.WIDTH, 1 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (2 * self.WIDTH, 1 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (1 * self.WIDTH, 1 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (0 * self.WIDTH, 1 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (3 * self.WIDTH, 0 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (2 * self.WIDTH, 0 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (1 * self.WIDTH, 0 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (0 * self.WIDTH, 0 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-        ]
-
-        self.FRAMES_EXIT = [
-            (0 * self.WIDTH, 5 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (3 * self.WIDTH, 4 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (2 * self.WIDTH, 4 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (1 * self.WIDTH, 4 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (0 * self.WIDTH, 4 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (3 * self.WIDTH, 3 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (2 * self.WIDTH, 3 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (1 * self.WIDTH, 3 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-            (0 * self.WIDTH, 3 * self.HEIGHT, self.WIDTH, self.HEIGHT),
-        ]
-
 
         super().__init__(SimpleRect(entry, self.WIDTH, self.HEIGHT))
         self.entry_flipped = entry_flipped
@@ -51,36 +55,31 @@ class Portal(GameObject):
         self.pos.y += self.shape.h
         self.current_frame = 0
         self.anim_timer = 0
-        sprite = pygame.image.load(os.path.join(config.assets_folder, 'graphics', 'portal.png')).convert_alpha()
-        new_size = (sprite.get_width() / 2 * SCALE, sprite.get_height() / 2  * SCALE)
-        self.sprite = pygame.transform.smoothscale(sprite, new_size)
-        self.sound = pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'teleport.mp3'))
-        self.sound.set_volume(1)
+        self.entry_frames = Portal.frames['entry'][bool(entry_flipped)]
+        self.exit_frames = Portal.frames['exit'][bool(exit_flipped)]
 
         self.bbox = (min(self.pos.x, self.exit.x), min(self.pos.y, self.exit.y), max(self.pos.x, self.exit.x), max(self.pos.y, self.exit.y))
 
+    def reset(self):
+        self.current_frame = 0
+        self.anim_timer = 0
+
     def animate(self):
         self.anim_timer += config.delta_time
         if self.anim_timer > self.FRAME_TIME:
             self.anim_timer = 0
             self.current_frame += 1
-            if self.current_frame == len(self.FRAMES_ENTRY) - 1:
+            if self.current_frame == len(self.entry_frames) - 1:
                 self.current_frame = 0
 
     def draw(self, surface: pygame.Surface, camera):
         self.animate()
 
-        entry_sprite = self.sprite.subsurface(self.FRAMES_ENTRY[self.current_frame]).copy()
-        entry_view_pos = camera.to_view_space(self.pos)
-        if self.entry_flipped:
-            entry_sprite = pygame.transform.flip(entry_sprite, True, False)
-        surface.blit(entry_sprite, (entry_view_pos.x, entry_view_pos.y, self.shape.w, self.shape.h))
-
-        exit_sprite = self.sprite.subsurface(self.FRAMES_EXIT[self.current_frame]).copy()
-        exit_view_pos = camera.to_view_space(self.exit)
-        if self.exit_flipped:
-            exit_sprite = pygame.transform.flip(exit_sprite, True, False)
-        surface.blit(exit_sprite, (exit_view_pos.x, exit_view_pos.y, self.shape.w, self.shape.h))
+        entry_view_pos = camera.to_view_space(self.pos, camera.view_pos)
+        surface.blit(self.entry_frames[self.current_frame], (entry_view_pos.x, entry_view_pos.y, self.shape.w, self.shape.h))
+
+        exit_view_pos = camera.to_view_space(self.exit, camera.view_pos)
+        surface.blit(self.exit_frames[self.current_frame], (exit_view_pos.x, exit_view_pos.y, self.shape.w, self.shape.h))
 
     def teleport(self, player):
         self.sound.play()
@@ -0,0 +1,157 @@
+import json, os, pygame, time
+from collections import deque
+from datetime import datetime
+
+from src import config
+from src.utils import get_user_folder, resource_path
+
+
+class NullProfiler:
+    """Used when profiling is disabled, so the hooks in the game loop cost no more than a method call"""
+    enabled = False
+
+    def begin_frame(self, frame_time: int = 0):
+        pass
+
+    def lap(self, section: str):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def toggle_overlay(self, key_down: bool = True):
+        pass
+
+    def draw(self, surface: pygame.Surface):
+        pass
+
+    def close(self):
+        pass
+
+
+class Profiler:
+    """Breaks each frame into sections by taking lap times at the hooks in the game loop.
+
+    The time since the previous lap is added to the given section, so a section called multiple times
+    per frame (e.g. the physics steps) adds up. The last frames are kept in a ring buffer, which is
+    dumped to disk when a frame takes longer than the spike threshold."""
+    enabled = True
+
+    def __init__(self, history: int = 300, spike_threshold: float = 20, log_file: str = None):
+        self.history: deque = deque(maxlen=history)
+        self.spike_threshold = spike_threshold
+        self.spike_folder = get_user_folder('profiles')
+        self.frames_since_dump = history
+        self.log = open(log_file, 'w') if log_file is not None else None
+
+        self.frame = 0
+        self.frame_time = 0
+        self.frame_start = 0
+        self.last_lap = 0
+        self.sections = {}
+
+        self.overlay = True
+        self.overlay_surface = None
+        self.font = None
+
+    def begin_frame(self, frame_time: int = 0):
+        """frame_time is the time since the previous frame, including the time waited for the frame rate limit"""
+        self.frame += 1
+        self.frame_time = frame_time
+        self.sections = {}
+        self.frame_start = self.last_lap = time.perf_counter()
+
+    def lap(self, section: str):
+        now = time.perf_counter()
+        self.sections[section] = self.sections.get(section, 0) + (now - self.last_lap) * 1000
+        self.last_lap = now
+
+    def end_frame(self):
+        total = (time.perf_counter() - self.frame_start) * 1000
+        record = (self.frame, config.ticks, self.frame_time, total, self.sections)
+        self.history.append(record)
+        self.frames_since_dump += 1
+
+        if self.log is not None:
+            self.log.write(json.dumps(self.to_dict(record)) + '\n')
+
+        # dump once the frames before the spike are in the buffer, so a stall doesn't dump every frame
+        if total > self.spike_threshold and self.frames_since_dump >= self.history.maxlen:
+            self.dump_history(record)
+
+    @staticmethod
+    def to_dict(record):
+        frame, ticks, frame_time, total, sections = record
+        return {
+            'frame': frame,
+            'ticks': ticks,
+            'frame_time': frame_time,
+            'total': round(total, 3),
+            'sections': {name: round(value, 3) for name, value in sections.items()},
+        }
+
+    def dump_history(self, spike):
+        self.frames_since_dump = 0
+        file_name = os.path.join(self.spike_folder, f'spike-{datetime.now().strftime("%Y%m%d-%H%M%S")}-{spike[0]}.json')
+        with open(file_name, 'w') as file:
+            json.dump({
+                'threshold': self.spike_threshold,
+                'spike': self.to_dict(spike),
+                'frames': [self.to_dict(record) for record in self.history],
+            }, file, indent=1)
+        print(f'Frame {spike[0]} took {round(spike[3], 1)}ms, wrote profile to {file_name}')
+
+    def get_averages(self, frames: int = 60):
+        """Returns the average ms per section and for the whole frame over the last frames"""
+        records = list(self.history)[-frames:]
+        if not records:
+            return {}, 0
+
+        averages = {}
+        for record in records:
+            for name, value in record[4].items():
+                averages[name] = averages.get(name, 0) + value / len(records)
+        return averages, sum(record[3] for record in records) / len(records)
+
+    def toggle_overlay(self, key_down: bool = True):
+        if key_down:
+            self.overlay = not self.overlay
+
+    def draw(self, surface: pygame.Surface):
+        if not self.overlay:
+            return
+
+        # rendering the text is expensive itself, so the overlay is only refreshed a few times per second
+        if self.overlay_surface is None or self.frame % 15 == 0:
+            self.overlay_surface = self.render_overlay(surface.get_height())
+        surface.blit(self.overlay_surface, (0, 0))
+
+    def render_overlay(self, height: int):
+        if self.font is None:
+            self.font = pygame.font.Font(resource_path(os.path.join('assets', 'console.ttf')), max(8, height // 50))
+
+        averages, total = self.get_averages()
+        lines = [f'frame {total:6.2f}ms'] + [f'{name:<16}{value:6.2f}ms' for name, value in averages.items()]
+
+        line_height = self.font.get_linesize()
+        width = max(self.font.size(line)[0] for line in lines) + 8
+        overlay = pygame.Surface((width, line_height * len(lines) + 8), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 160))
+
+        for i, line in enumerate(lines):
+            color = (255, 96, 96) if i == 0 and total > self.spike_threshold else (255, 255, 255)
+            overlay.blit(self.font.render(line, True, color), (4, 4 + i * line_height))
+
+        return overlay
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+
+def create_profiler(settings):
+    if not settings.get('profile'):
+        return NullProfiler()
+
+    return Profiler(spike_threshold=settings.get('profile_spike_ms') or 20, log_file=settings.get('profile_log'))
@@ -0,0 +1,323 @@
+import pygame, os, math
+from typing import NamedTuple
+
+import numpy as np
+
+from src.Collider import Collider
+from src.Rectangle import Rectangle
+from src.Triangle import Triangle
+from src import config
+
+def pre_load_projectiles(SCALE:int = 1):
+    for projectile in ProjectilePool.TYPES:
+        if config.headless:
+            ProjectilePool.types[projectile] = None
+            continue
+        sprite = pygame.image.load(os.path.join(config.assets_folder, 'graphics', f'projectile_{projectile}.png')).convert_alpha()
+        ProjectilePool.types[projectile] = pygame.transform.scale(sprite, (sprite.get_width() / 5 * SCALE, sprite.get_height() / 5 * SCALE))
+
+
+class ProjectileHit(NamedTuple):
+    """A projectile hitting a collider, returned by ProjectilePool.update"""
+    type: str
+    x: float
+    y: float
+    collider: Collider
+
+
+class ProjectilePool:
+    """All projectiles of the map (rockets and plasma), stored as arrays instead of one object each.
+
+    All projectiles are moved in one vectorized step per tick. They are then tested in bulk against the
+    bounding boxes of the active colliders they can hit, and only those close to a collider are checked
+    exactly, one by one. The exact check and the float operations of the step are the same as they were
+    per projectile, so replays don't change.
+
+    Hits are returned as events, newest projectile first, for the map to play sounds, push the player
+    and add decals."""
+
+    TYPES = ['rocket', 'plasma']
+    # the colliders projectiles can hit, a bit each
+    BUCKETS = {'static': 1, 'ramp': 2, 'wall': 4}
+    # the volume of the flying sound is only changed by at least this much
+    VOLUME_STEP = 0.01
+
+    types = {}
+
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self.allocate(capacity)
+
+        # per projectile, in the same order as the arrays
+        self.sounds: list[pygame.mixer.Channel|None] = []
+        self.sprites: list[pygame.Surface|None] = []
+        self.collide_with: list[list[str]] = []
+
+        # bounding boxes of the active colliders per bucket, valid until the active set changes
+        self.collider_bboxes: dict[str, np.ndarray] = {}
+        self.version = None
+
+    def allocate(self, capacity: int):
+        def grow(array, dtype):
+            grown = np.zeros(capacity, dtype=dtype)
+            if array is not None:
+                grown[:self.count] = array[:self.count]
+            return grown
+
+        self.x = grow(getattr(self, 'x', None), np.float64)
+        self.y = grow(getattr(self, 'y', None), np.float64)
+        self.vel_x = grow(getattr(self, 'vel_x', None), np.float64)
+        self.vel_y = grow(getattr(self, 'vel_y', None), np.float64)
+        self.target_vel = grow(getattr(self, 'target_vel', None), np.float64)
+        self.acc = grow(getattr(self, 'acc', None), np.float64)
+        self.start_time = grow(getattr(self, 'start_time', None), np.float64)
+        self.duration = grow(getattr(self, 'duration', None), np.float64)
+        self.volume = grow(getattr(self, 'volume', None), np.float64)
+        self.type = grow(getattr(self, 'type', None), np.int8)
+        self.mask = grow(getattr(self, 'mask', None), np.int8)
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, type: str, duration: float, x: float, y: float, vel_x: float = 0.0, vel_y: float = 0.0, target_vel: float = 0.0, acc: float = 0.0, sound: pygame.mixer.Channel = None, collide_with: str|list[str] = ['static', 'ramp']):
+        if self.count == len(self.x):
+            self.allocate(len(self.x) * 2)
+
+        collide_with = isinstance(collide_with, list) and collide_with or [collide_with]
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.vel_x[i] = vel_x
+        self.vel_y[i] = vel_y
+        self.target_vel[i] = target_vel
+        self.acc[i] = acc
+        self.start_time[i] = config.ticks
+        self.duration[i] = duration
+        self.volume[i] = -1
+        self.type[i] = self.TYPES.index(type)
+        self.mask[i] = sum(self.BUCKETS.get(name, 0) for name in set(collide_with))
+        self.count += 1
+
+        sprite = None
+        if ProjectilePool.types[type] is not None:
+            sprite = pygame.transform.rotate(ProjectilePool.types[type], -math.degrees(math.atan2(vel_y, vel_x)))
+        self.sounds.append(sound)
+        self.sprites.append(sprite)
+        self.collide_with.append(collide_with)
+
+    def clear(self):
+        for sound in self.sounds:
+            if sound is not None:
+                sound.stop()
+        self.count = 0
+        self.sounds = []
+        self.sprites = []
+        self.collide_with = []
+
+    def remove(self, removed: np.ndarray):
+        """Removes the projectiles of a bool array, keeping the order of the others"""
+        n = self.count
+        keep = ~removed
+        for array in (self.x, self.y, self.vel_x, self.vel_y, self.target_vel, self.acc, self.start_time, self.duration, self.volume, self.type, self.mask):
+            kept = array[:n][keep]
+            array[:len(kept)] = kept
+        indices = np.flatnonzero(keep).tolist()
+        self.sounds = [self.sounds[i] for i in indices]
+        self.sprites = [self.sprites[i] for i in indices]
+        self.collide_with = [self.collide_with[i] for i in indices]
+        self.count = len(indices)
+
+    def update(self, map) -> list[ProjectileHit]:
+        """Moves all projectiles by one tick, removes the expired ones and those which hit a collider"""
+        n = self.count
+        if n == 0:
+            return []
+
+        delta_time = config.delta_time
+        x, y = self.x[:n], self.y[:n]
+        vel_x, vel_y = self.vel_x[:n], self.vel_y[:n]
+        target_vel, acc = self.target_vel[:n], self.acc[:n]
+
+        expired = self.start_time[:n] + self.duration[:n] < config.ticks
+        moving = ~expired & ((vel_x != 0) | (vel_y != 0))
+        start_x = x.copy()
+        start_y = y.copy()
+        x[moving] += vel_x[moving] * delta_time
+        y[moving] += vel_y[moving] * delta_time
+        accelerating = moving & (vel_x > target_vel)
+        vel_x[accelerating] += acc[accelerating] * delta_time
+        accelerating = moving & (vel_y > target_vel)
+        vel_y[accelerating] += acc[accelerating] * delta_time
+
+        player_pos = map.game.player.pos
+        self.update_volumes(moving, player_pos.x, player_pos.y)
+
+        removed = expired
+        hits = []
+        near = self.get_near_colliders(map, moving, start_x, start_y)
+        if near.any():
+            xs, ys, start_xs, start_ys = x.tolist(), y.tolist(), start_x.tolist(), start_y.tolist()
+            # newest first, the order they were updated in before
+            for i in np.flatnonzero(near)[::-1].tolist():
+                hit = self.check_collisions(map, i, start_xs[i], start_ys[i], xs[i], ys[i])
+                if hit is not None:
+                    hits.append(hit)
+                    removed[i] = True
+
+        if removed.any():
+            self.remove(removed)
+        return hits
+
+    def update_volumes(self, moving: np.ndarray, player_x: float, player_y: float):
+        """Sets the volume of the flying sounds by the distance to the player"""
+        sounds = self.sounds
+        for i in np.flatnonzero(moving).tolist():
+            sound = sounds[i]
+            if sound is None:
+                continue
+            dx = player_x - float(self.x[i])
+            dy = player_y - float(self.y[i])
+            volume = self.volume_for_distance(math.sqrt(dx ** 2 + dy ** 2))
+            if abs(volume - self.volume[i]) >= self.VOLUME_STEP:
+                sound.set_volume(volume)
+                self.volume[i] = volume
+
+    def get_near_colliders(self, map, moving: np.ndarray, start_x: np.ndarray, start_y: np.ndarray):
+        """Returns a bool array of the moving projectiles whose path this tick touches the bounding box of an
+        active collider they can hit. Projectiles which aren't near any can't hit one."""
+        active_set = map.active_set
+        if self.version != active_set.version:
+            self.version = active_set.version
+            self.collider_bboxes = {}
+            for name in self.BUCKETS:
+                bboxes = [self.get_bbox(collider) for collider in active_set.buckets[map.BUCKETS[name]]]
+                self.collider_bboxes[name] = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        min_x = np.minimum(start_x, x)[:, None]
+        max_x = np.maximum(start_x, x)[:, None]
+        min_y = np.minimum(start_y, y)[:, None]
+        max_y = np.maximum(start_y, y)[:, None]
+        mask = self.mask[:n]
+
+        near = np.zeros(n, dtype=bool)
+        for name, bit in self.BUCKETS.items():
+            bboxes = self.collider_bboxes[name]
+            if len(bboxes) == 0:
+                continue
+            selected = moving & ((mask & bit) != 0) & ~near
+            if not selected.any():
+                continue
+            overlaps = (bboxes[:, 0] <= max_x) & (bboxes[:, 2] >= min_x) & (bboxes[:, 1] <= max_y) & (bboxes[:, 3] >= min_y)
+            near |= selected & overlaps.any(axis=1)
+        return near
+
+    @staticmethod
+    def get_bbox(collider: Collider):
+        shape = collider.shape
+        if isinstance(shape, Triangle):
+            p1, p2, p3 = shape.p1, shape.p2, shape.p3
+            # a triangle without an area contains all points on its line, see point_in_triangle
+            if (p2.x - p1.x) * (p3.y - p1.y) == (p3.x - p1.x) * (p2.y - p1.y):
+                return -math.inf, -math.inf, math.inf, math.inf
+        return shape.bbox
+
+    def check_collisions(self, map, i: int, start_x: float, start_y: float, x: float, y: float):
+        """Checks the projectile i, which moved from (start_x, start_y) to (x, y) this tick, against its
+        candidate colliders. Returns the hit or None."""
+        colliders = []
+        for name in self.collide_with[i]:
+            if name in self.BUCKETS:
+                colliders += map.broadphase.query(map.BUCKETS[name], min(start_x, x), max(start_x, x))
+
+        collider = self.check_point_collisions(colliders, x, y)
+
+        # a fast projectile can pass through a thin collider within a tick
+        passed = self.check_swept_collisions(colliders, start_x, start_y, x, y)
+        if passed is not None:
+            entry = collider.shape.get_ray_entry(start_x, start_y, x, y) if collider is not None else None
+            if collider is None or (entry is not None and passed[1] < entry):
+                collider, t = passed
+                x = start_x + (x - start_x) * t
+                y = start_y + (y - start_y) * t
+
+        if collider is None:
+            return None
+
+        if self.sounds[i] is not None:
+            self.sounds[i].stop()
+        self.x[i] = x
+        self.y[i] = y
+        return ProjectileHit(self.TYPES[self.type[i]], x, y, collider)
+
+    def check_point_collisions(self, collider_list, x: float, y: float):
+        """Returns the first collider containing the point:
+           - For Rectangle: usual AABB test (edges excluded)
+           - For Triangle: uses point_in_triangle
+        """
+        for collider in collider_list:
+            shape = collider.shape
+            if isinstance(shape, Rectangle):
+                if shape.pos.x < x < shape.pos.x + shape.w and shape.pos.y < y < shape.pos.y + shape.h:
+                    return collider
+            elif isinstance(shape, Triangle):
+                if self.point_in_triangle(x, y, shape):
+                    return collider
+
+        return None
+
+    def check_swept_collisions(self, collider_list, start_x: float, start_y: float, x: float, y: float):
+        """Finds the colliders a projectile passed through while moving from (start_x, start_y) to (x, y) in
+        this tick, without ending up inside them. Returns the first one on the way and the fraction of the
+        way at which it was entered, or None."""
+        passed = None
+        for collider in collider_list:
+            t = collider.shape.get_ray_entry(start_x, start_y, x, y)
+            if t is None or (passed is not None and t >= passed[1]):
+                continue
+
+            shape = collider.shape
+            if isinstance(shape, Rectangle):
+                inside = shape.pos.x < x < shape.pos.x + shape.w and shape.pos.y < y < shape.pos.y + shape.h
+            else:
+                inside = self.point_in_triangle(x, y, shape)
+            if not inside:
+                passed = (collider, t)
+        return passed
+
+    @staticmethod
+    def point_in_triangle(x: float, y: float, t: Triangle):
+        def sign(p1x, p1y, p2, p3):
+            return (p1x - p3.x) * (p2.y - p3.y) - (p2.x - p3.x) * (p1y - p3.y)
+
+        b1 = sign(x, y, t.p1, t.p2) < 0.0
+        b2 = sign(x, y, t.p2, t.p3) < 0.0
+        b3 = sign(x, y, t.p3, t.p1) < 0.0
+        return (b1 == b2) and (b2 == b3)
+
+    @staticmethod
+    def volume_for_distance(distance):
+        return min(1.1, max(0.05, 1.1 - (distance / 2674)))
+
+    def draw(self, surface: pygame.Surface, camera):
+        camera_x = camera.pos.x
+        camera_y = camera.pos.y
+        for sprite, x, y in zip(self.sprites, self.x[:self.count].tolist(), self.y[:self.count].tolist()):
+            surface.blit(sprite, (x - camera_x, y - camera_y))
+
+    def get_state(self):
+        """Returns a json serializable snapshot, one list per projectile"""
+        n = self.count
+        types = [self.TYPES[type] for type in self.type[:n].tolist()]
+        return [list(state) for state in zip(types, self.duration[:n].tolist(), self.x[:n].tolist(), self.y[:n].tolist(),
+                                             self.vel_x[:n].tolist(), self.vel_y[:n].tolist(), self.target_vel[:n].tolist(),
+                                             self.acc[:n].tolist(), self.collide_with, [int(start_time) for start_time in self.start_time[:n].tolist()])]
+
+    def set_state(self, state: list):
+        """Restores a snapshot returned by get_state. The sounds are not restored, as the channels they were
+        playing on are gone"""
+        self.clear()
+        for type, duration, x, y, vel_x, vel_y, target_vel, acc, collide_with, start_time in state:
+            self.spawn(type, duration, x, y, vel_x, vel_y, target_vel, acc, None, collide_with)
+            self.start_time[self.count - 1] = start_time
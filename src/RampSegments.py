@@ -0,0 +1,78 @@
+import numpy as np
+
+from src.Collider import Collider
+from src.Rectangle import Rectangle
+
+
+class RampSegments:
+    """The top sides of all ramps, precomputed at map load, to check a rectangle against them.
+
+    The top sides of a ramp are the sides at its highest vertex (lowest y), without vertical ones (see
+    Triangle.top_edges). check_rectangle returns the first side, in the order of the candidates and their
+    sides, which Rectangle.line_intersects_rectangle finds to intersect the rectangle.
+
+    The sides are also stored in NumPy arrays. Many candidates are checked in one batch, which runs the
+    same float operations as Rectangle.line_intersects_rectangle on all of them at once, so both give the
+    same result. A few candidates are checked one by one, as the batch has a fixed overhead."""
+
+    # candidates with fewer sides than this are checked one by one (see benchmarks/ramp_segments.py)
+    MIN_BATCH = 128
+
+    def __init__(self, ramp_colliders: list[Collider]):
+        # (collider, RampEdge) per row of the arrays, the rows of each collider
+        self.sides: list[tuple] = []
+        self.rows: dict[Collider, list[int]] = {}
+        for collider in ramp_colliders:
+            self.rows[collider] = []
+            for side in collider.shape.top_edges:
+                self.rows[collider].append(len(self.sides))
+                self.sides.append((collider, side))
+
+        self.x1 = np.array([side.p1.x for _, side in self.sides], dtype=np.float64)
+        self.y1 = np.array([side.p1.y for _, side in self.sides], dtype=np.float64)
+        self.x2 = np.array([side.p2.x for _, side in self.sides], dtype=np.float64)
+        self.y2 = np.array([side.p2.y for _, side in self.sides], dtype=np.float64)
+
+    def check_rectangle(self, rect: Rectangle, candidates: list[Collider]):
+        """Returns the first top side (a RampEdge) of the candidates the rectangle intersects, or None"""
+        rows = self.rows
+        if len(candidates) * 2 < self.MIN_BATCH:
+            sides = self.sides
+            for collider in candidates:
+                for row in rows[collider]:
+                    side = sides[row][1]
+                    if rect.line_intersects_rectangle(side.p1, side.p2):
+                        return side
+            return None
+
+        # not cached, the candidates are often a new list (see Broadphase.query)
+        batch_rows = np.array([row for collider in candidates for row in rows[collider]], dtype=np.intp)
+        hits = self.intersect(rect, self.x1[batch_rows], self.y1[batch_rows], self.x2[batch_rows], self.y2[batch_rows])
+        if not hits.any():
+            return None
+        return self.sides[batch_rows[int(np.argmax(hits))]][1]
+
+    @staticmethod
+    def intersect(rect: Rectangle, x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray):
+        """Rectangle.line_intersects_rectangle for arrays of segments, returns a bool array"""
+        left = rect.pos.x
+        top = rect.pos.y
+        right = rect.pos.x + rect.w
+        bottom = rect.pos.y + rect.h
+
+        # either endpoint inside the rectangle
+        hits = ((left <= x1) & (x1 <= right) & (top <= y1) & (y1 <= bottom)) | ((left <= x2) & (x2 <= right) & (top <= y2) & (y2 <= bottom))
+
+        # the segment intersecting one of the edges, see Rectangle.line_segments_intersect
+        d1x = x2 - x1
+        d1y = y2 - y1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for (x3, y3), (x4, y4) in (((left, top), (right, top)), ((right, top), (right, bottom)), ((right, bottom), (left, bottom)), ((left, bottom), (left, top))):
+                d2x = x4 - x3
+                d2y = y4 - y3
+                det = d1x * d2y - d1y * d2x
+                s = ((x3 - x1) * d2y - (y3 - y1) * d2x) / det
+                t = ((x3 - x1) * d1y - (y3 - y1) * d1x) / det
+                hits |= (det != 0) & (0 <= s) & (s <= 1) & (0 <= t) & (t <= 1)
+
+        return hits
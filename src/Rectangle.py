@@ -5,9 +5,15 @@ import pygame
 
 class Rectangle(SimpleRect):
     """Rectangle class for collider rectangles"""
-    def __init__(self, pos = Vector2(), w = 0, h = 0, texture: Texture|None=None):
+
+    __slots__ = ('surface', 'rle_surface', 'bbox', 'texture')
+
+    def __init__(self, pos = Vector2(), w = 0, h = 0, texture: Texture|None=None, surface: pygame.Surface|None=None):
         super().__init__(pos, w, h)
-        self.surface = None
+        # surface can be passed in already rendered (see CompiledMap)
+        self.surface = surface
+        # drawn instead of the surface if set (see RleSurface)
+        self.rle_surface = None
 
         self.bbox = (self.pos.x, self.pos.y, self.pos.x + self.w, self.pos.y + self.h)
 
@@ -63,8 +69,10 @@ class Rectangle(SimpleRect):
                         self.surface.blit(texture.surface, (final_x, final_y))
 
     def draw(self, target_surface: pygame.Surface, camera, outline=None):
-        view_pos = camera.to_view_space(self.pos)
-        if self.surface is not None:
+        view_pos = camera.to_view_space(self.pos, camera.view_pos)
+        if self.rle_surface is not None:
+            self.rle_surface.draw(target_surface, view_pos.x, view_pos.y)
+        elif self.surface is not None:
             target_surface.blit(self.surface, (view_pos.x, view_pos.y))
         else:
             pygame.draw.rect(target_surface, (0, 0, 0, 128), (view_pos.x, view_pos.y, self.w, self.h), outline)
@@ -78,11 +86,64 @@ class Rectangle(SimpleRect):
                    other.pos.y >= self.pos.y + self.h)
 
     def check_collisions(self, collider_list):
-        """Check collisions between two rectangles, if in a rangle of 100px, returns a single collider"""
+        """Check collisions between two rectangles, returns the first colliding collider.
+        The list should only contain the candidates near this rect (see Broadphase)."""
         for collider in collider_list:
-            if abs(self.pos.x - collider.pos.x) < 100 or collider.shape.w >= 100:  # Wider colliders are checked anyway
-                if self.overlaps(collider.shape):
-                    return collider
+            if self.overlaps(collider.shape):
+                return collider
+
+    def get_entry_distance(self, other, start_x: float, start_y: float):
+        """Distance this rect moved from (start_x, start_y) along one axis, until its leading edge reached the
+        other rect (negative if it already overlapped at the start). None if they don't overlap on the other axis."""
+        if self.pos.x != start_x:
+            if not (other.pos.y < self.pos.y + self.h and other.pos.y + other.h > self.pos.y):
+                return None
+            if self.pos.x > start_x:
+                return other.pos.x - (start_x + self.w)
+            return start_x - (other.pos.x + other.w)
+
+        if self.pos.y != start_y:
+            if not (other.pos.x < self.pos.x + self.w and other.pos.x + other.w > self.pos.x):
+                return None
+            if self.pos.y > start_y:
+                return other.pos.y - (start_y + self.h)
+            return start_y - (other.pos.y + other.h)
+
+        return None
+
+    def check_swept_collisions(self, collider_list, start_x: float, start_y: float):
+        """Finds the colliders this rect passed through completely while moving from (start_x, start_y) along one
+        axis, which check_collisions can't see as they don't overlap with the rect anymore.
+        Returns the first one on the way and its entry distance (see get_entry_distance), or None."""
+        travel = abs(self.pos.x - start_x) + abs(self.pos.y - start_y)
+        passed = None
+        for collider in collider_list:
+            distance = self.get_entry_distance(collider.shape, start_x, start_y)
+            if distance is None or not 0 <= distance < travel or self.overlaps(collider.shape):
+                continue
+            if passed is None or distance < passed[1]:
+                passed = (collider, distance)
+        return passed
+
+    def get_ray_entry(self, x1: float, y1: float, x2: float, y2: float):
+        """Returns the fraction (0 to 1) of the segment from (x1, y1) to (x2, y2) at which it enters the
+        inside of this rect, or None if it doesn't"""
+        t_enter = 0.0
+        t_exit = 1.0
+        for start, delta, low, high in ((x1, x2 - x1, self.pos.x, self.pos.x + self.w), (y1, y2 - y1, self.pos.y, self.pos.y + self.h)):
+            if delta == 0:
+                if not low < start < high:
+                    return None
+                continue
+
+            t_low = (low - start) / delta
+            t_high = (high - start) / delta
+            t_enter = max(t_enter, min(t_low, t_high))
+            t_exit = min(t_exit, max(t_low, t_high))
+            if t_enter >= t_exit:
+                return None
+
+        return t_enter
 
     def check_center_collisions(self, collider_list, less_x = 0, less_y = 0):
         """Check collision of the center of this rect and another rectangle"""
@@ -94,51 +155,10 @@ class Rectangle(SimpleRect):
         """Check collisions but return a list of all colliding entities"""
         others = []
         for entity in entity_list:
-            if entity.shape is not self and abs(self.pos.x - entity.pos.x) < 100:
-                if self.overlaps(entity.shape):
-                    others.append(entity)
+            if entity.shape is not self and self.overlaps(entity.shape):
+                others.append(entity)
         return others
 
-    def check_triangle_top_sides_collision(self, collider_list):
-        """
-        Checks if this rectangle collides with any of the "top sides" of the given triangles.
-        The "top sides" are the two sides connected to the highest vertex (lowest y-coordinate).
-
-        Args:
-            collider_list: A list of Triangle objects to check against
-
-        Returns:
-            A tuple of (Vector2, Vector2) representing the colliding side, or None if no collision
-        """
-
-        for collider in collider_list:
-            triangle = collider.shape
-            # Find the highest vertex (lowest y-coordinate)
-            vertices = [triangle.p1, triangle.p2, triangle.p3]
-            highest_vertex_idx = 0
-            for i in range(1, 3):
-                if vertices[i].y < vertices[highest_vertex_idx].y:
-                    highest_vertex_idx = i
-
-            # Determine the two sides connected to the highest vertex
-            top_sides = []
-            if highest_vertex_idx == 0:
-                top_sides = [(triangle.p1, triangle.p2), (triangle.p1, triangle.p3)]
-            elif highest_vertex_idx == 1:
-                top_sides = [(triangle.p2, triangle.p1), (triangle.p2, triangle.p3)]
-            else:  # highest_vertex_idx == 2
-                top_sides = [(triangle.p3, triangle.p1), (triangle.p3, triangle.p2)]
-
-            # Check if the rectangle intersects with either of these sides
-            for side in top_sides:
-                # ignore vertical sides
-                if side[0].x == side[1].x:
-                    continue
-                if self.line_intersects_rectangle(side[0], side[1]):
-                    return side
-
-        return None
-
     def line_intersects_rectangle(self, p1, p2):
         """
         Checks if a line segment intersects with this rectangle.
@@ -150,25 +170,22 @@ class Rectangle(SimpleRect):
         Returns:
             True if the line intersects with the rectangle, False otherwise
         """
-        # Rectangle edges
-        rect_edges = [
-            (Vector2(self.pos.x, self.pos.y), Vector2(self.pos.x + self.w, self.pos.y)),  # Top
-            (Vector2(self.pos.x + self.w, self.pos.y), Vector2(self.pos.x + self.w, self.pos.y + self.h)),  # Right
-            (Vector2(self.pos.x + self.w, self.pos.y + self.h), Vector2(self.pos.x, self.pos.y + self.h)),  # Bottom
-            (Vector2(self.pos.x, self.pos.y + self.h), Vector2(self.pos.x, self.pos.y))  # Left
-        ]
+        left = self.pos.x
+        top = self.pos.y
+        right = left + self.w
+        bottom = top + self.h
+        x1, y1, x2, y2 = p1.x, p1.y, p2.x, p2.y
 
         # Check if either endpoint is inside the rectangle
-        if (self.pos.x <= p1.x <= self.pos.x + self.w and self.pos.y <= p1.y <= self.pos.y + self.h) or \
-                (self.pos.x <= p2.x <= self.pos.x + self.w and self.pos.y <= p2.y <= self.pos.y + self.h):
+        if (left <= x1 <= right and top <= y1 <= bottom) or (left <= x2 <= right and top <= y2 <= bottom):
             return True
 
-        # Check if the line intersects with any of the rectangle's edges
-        for edge in rect_edges:
-            if self.line_segments_intersect(p1, p2, edge[0], edge[1]):
-                return True
-
-        return False
+        # Check if the line intersects with any of the rectangle's edges (top, right, bottom, left)
+        intersect = self.segments_intersect
+        return (intersect(x1, y1, x2, y2, left, top, right, top) or
+                intersect(x1, y1, x2, y2, right, top, right, bottom) or
+                intersect(x1, y1, x2, y2, right, bottom, left, bottom) or
+                intersect(x1, y1, x2, y2, left, bottom, left, top))
 
     def line_segments_intersect(self, p1, p2, p3, p4):
         """
@@ -181,11 +198,16 @@ class Rectangle(SimpleRect):
         Returns:
             True if the line segments intersect, False otherwise
         """
+        return self.segments_intersect(p1.x, p1.y, p2.x, p2.y, p3.x, p3.y, p4.x, p4.y)
+
+    @staticmethod
+    def segments_intersect(x1, y1, x2, y2, x3, y3, x4, y4):
+        """line_segments_intersect on plain coordinates, without creating vectors"""
         # Calculate the direction vectors
-        d1x = p2.x - p1.x
-        d1y = p2.y - p1.y
-        d2x = p4.x - p3.x
-        d2y = p4.y - p3.y
+        d1x = x2 - x1
+        d1y = y2 - y1
+        d2x = x4 - x3
+        d2y = y4 - y3
 
         # Calculate the determinant
         det = d1x * d2y - d1y * d2x
@@ -195,8 +217,8 @@ class Rectangle(SimpleRect):
             return False
 
         # Calculate the parameters for the intersection point
-        s = ((p3.x - p1.x) * d2y - (p3.y - p1.y) * d2x) / det
-        t = ((p3.x - p1.x) * d1y - (p3.y - p1.y) * d1x) / det
+        s = ((x3 - x1) * d2y - (y3 - y1) * d2x) / det
+        t = ((x3 - x1) * d1y - (y3 - y1) * d1x) / det
 
         # Check if the intersection point is within both line segments
         return 0 <= s <= 1 and 0 <= t <= 1
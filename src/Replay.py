@@ -0,0 +1,182 @@
+import bisect, json, os, struct
+
+from src import config
+from src.Input import Input
+from src.Settings import Settings
+
+# Binary replay format (little endian):
+#
+#   header:   magic 'RSRP', version (u8), physics tick in ms (u8), resolution (u16, u16), scale (f64),
+#             flags (u8), map name and camera style (u8 length + utf-8 each)
+#   records:  type (char) + game tick (u32), followed by
+#             'I' input:    action index << 1 | pressed (u8)
+#             'K' keyframe: payload length (u32) + json snapshot of the game state before that tick
+#             'E' end:      no payload, written when the recording is closed
+#
+# Inputs are recorded as they happen and applied before the physics step of their tick, in recording order.
+# Records are appended and flushed as they are written, so a recording is readable even if the game crashed.
+
+MAGIC = b'RSRP'
+VERSION = 1
+
+HEADER = struct.Struct('<4sBBHHdB')
+RECORD = struct.Struct('<cI')
+INPUT = struct.Struct('<B')
+KEYFRAME = struct.Struct('<I')
+
+RECORD_INPUT = b'I'
+RECORD_KEYFRAME = b'K'
+RECORD_END = b'E'
+
+FLAG_LAUNCH_ON_RAMP_JUMP = 1
+FLAG_NEW_PLASMA = 2
+
+
+def write_string(file, value: str):
+    data = value.encode('utf-8')
+    file.write(struct.pack('<B', len(data)))
+    file.write(data)
+
+def read_string(file):
+    length, = struct.unpack('<B', file.read(1))
+    return file.read(length).decode('utf-8')
+
+
+class ReplayRecorder:
+    """Streams the inputs of a run and periodic keyframes into a replay file"""
+
+    def __init__(self, file_path: str, map_name: str, settings: Settings, keyframe_interval: int = config.REPLAY_KEYFRAME_INTERVAL):
+        self.file_path = file_path
+        self.keyframe_interval = keyframe_interval
+        self.file = open(file_path, 'wb')
+
+        flags = 0
+        if settings.launch_on_ramp_jump:
+            flags |= FLAG_LAUNCH_ON_RAMP_JUMP
+        if settings.new_plasma:
+            flags |= FLAG_NEW_PLASMA
+
+        self.file.write(HEADER.pack(MAGIC, VERSION, config.PHYSICS_TICK, settings.resolution[0], settings.resolution[1], settings.get_scale(), flags))
+        write_string(self.file, map_name)
+        write_string(self.file, settings.camera_style)
+        self.file.flush()
+
+    def record_input(self, tick: int, action: str, pressed: bool):
+        self.file.write(RECORD.pack(RECORD_INPUT, tick))
+        self.file.write(INPUT.pack(Input.PLAYER_ACTIONS.index(action) << 1 | int(pressed)))
+        self.file.flush()
+
+    def record_keyframe(self, tick: int, state: dict):
+        payload = json.dumps(state, separators=(',', ':')).encode('utf-8')
+        self.file.write(RECORD.pack(RECORD_KEYFRAME, tick))
+        self.file.write(KEYFRAME.pack(len(payload)))
+        self.file.write(payload)
+        self.file.flush()
+
+    def close(self, tick: int):
+        if self.file.closed:
+            return
+        self.file.write(RECORD.pack(RECORD_END, tick))
+        self.file.close()
+
+
+class Replay:
+    """A recorded run that can be played back (and seeked) through the regular game simulation"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.inputs: list[tuple[int, str, bool]] = []
+        self.keyframes: list[tuple[int, int, int]] = []
+        self.end_tick = None
+        self.next_input = 0
+
+        with open(file_path, 'rb') as file:
+            file_size = os.fstat(file.fileno()).st_size
+            magic, version, physics_tick, width, height, scale, flags = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC:
+                raise Exception(f'Not a replay file: {file_path}')
+            if version != VERSION:
+                raise Exception(f'Unsupported replay version: {version}')
+            if physics_tick != config.PHYSICS_TICK:
+                raise Exception(f'Replay was recorded with a physics tick of {physics_tick}ms, expected {config.PHYSICS_TICK}ms')
+
+            self.resolution = [width, height]
+            self.scale = scale
+            self.launch_on_ramp_jump = bool(flags & FLAG_LAUNCH_ON_RAMP_JUMP)
+            self.new_plasma = bool(flags & FLAG_NEW_PLASMA)
+            self.map_name = read_string(file)
+            self.camera_style = read_string(file)
+
+            while True:
+                record = file.read(RECORD.size)
+                # a truncated record means the recording was interrupted
+                if len(record) < RECORD.size:
+                    break
+
+                record_type, tick = RECORD.unpack(record)
+                if record_type == RECORD_INPUT:
+                    data = file.read(INPUT.size)
+                    if len(data) < INPUT.size:
+                        break
+                    value, = INPUT.unpack(data)
+                    self.inputs.append((tick, Input.PLAYER_ACTIONS[value >> 1], bool(value & 1)))
+                elif record_type == RECORD_KEYFRAME:
+                    data = file.read(KEYFRAME.size)
+                    if len(data) < KEYFRAME.size:
+                        break
+                    length, = KEYFRAME.unpack(data)
+                    offset = file.tell()
+                    if offset + length > file_size:
+                        break
+                    file.seek(length, 1)
+                    self.keyframes.append((tick, offset, length))
+                elif record_type == RECORD_END:
+                    self.end_tick = tick
+                    break
+                else:
+                    raise Exception(f'Invalid replay record: {record_type}')
+
+        if self.end_tick is None:
+            self.end_tick = max([tick for tick, _, _ in self.inputs] + [tick for tick, _, _ in self.keyframes] + [0])
+
+        self.input_ticks = [tick for tick, _, _ in self.inputs]
+
+    def apply_settings(self, settings: Settings):
+        """Changes the settings which affect the simulation to the ones the replay was recorded with"""
+        settings.resolution = list(self.resolution)
+        settings.camera_style = self.camera_style
+        settings.launch_on_ramp_jump = self.launch_on_ramp_jump
+        settings.new_plasma = self.new_plasma
+
+        if settings.get_scale() != self.scale:
+            raise Exception(f'Replay scale {self.scale} does not match the game scale {settings.get_scale()}')
+
+    def apply_inputs(self, game):
+        """Passes all recorded inputs up to the current tick of the game to the player"""
+        while self.next_input < len(self.inputs) and self.inputs[self.next_input][0] <= game.tick:
+            _, action, pressed = self.inputs[self.next_input]
+            game.player_input(action, pressed)
+            self.next_input += 1
+
+    def is_finished(self, game):
+        return game.tick >= self.end_tick
+
+    def read_keyframe(self, offset: int, length: int):
+        with open(self.file_path, 'rb') as file:
+            file.seek(offset)
+            return json.loads(file.read(length))
+
+    def seek(self, game, tick: int):
+        """Restores the last keyframe before the given tick and simulates the remaining ticks from there"""
+        keyframe_ticks = [keyframe[0] for keyframe in self.keyframes]
+        index = bisect.bisect_right(keyframe_ticks, tick) - 1
+        if index >= 0 and (keyframe_ticks[index] > game.tick or tick < game.tick):
+            keyframe_tick, offset, length = self.keyframes[index]
+            game.set_state(self.read_keyframe(offset, length))
+            # inputs of the keyframe tick were applied before the snapshot was taken
+            self.next_input = bisect.bisect_right(self.input_ticks, keyframe_tick)
+        elif tick < game.tick:
+            raise Exception(f'Can not seek back to tick {tick}, the replay has no keyframe before it')
+
+        while game.tick < tick:
+            game.step()
@@ -0,0 +1,64 @@
+import pygame
+import numpy as np
+
+
+class RleSurface:
+    """A collider surface split up to be blitted faster, drawn the same as blitting the surface itself.
+
+    SDL blits RLE accelerated surfaces several times faster than alpha blending every pixel, as runs of
+    transparent pixels are skipped and runs of opaque pixels are copied. It blends translucent pixels with
+    a different rounding than a plain blit though, so these are moved into a layer without RLE, cropped to
+    where they are. SDL encodes the RLE surface on its first blit to a target, which takes longer than
+    drawing a frame for big surfaces, so that is done when the surface is created (e.g. when loading a map).
+    The encoding holds the GIL, so it can't be moved to a thread either."""
+
+    def __init__(self, surface: pygame.Surface, target: pygame.Surface):
+        # the opaque pixels, None if there are none
+        self.surface: pygame.Surface|None = surface
+        # the translucent pixels and their position in the surface, None if there are none
+        self.layer: pygame.Surface|None = None
+        self.layer_pos = (0, 0)
+
+        alpha = pygame.surfarray.pixels_alpha(surface)
+        # 0 wraps around to 255
+        translucent = alpha - np.uint8(1) < 254
+        del alpha
+        columns = np.flatnonzero(translucent.any(axis=1))
+        if len(columns):
+            rows = np.flatnonzero(translucent.any(axis=0))
+            x, y = int(columns[0]), int(rows[0])
+            w, h = int(columns[-1]) + 1 - x, int(rows[-1]) + 1 - y
+            self.layer = surface.subsurface((x, y, w, h)).copy()
+            layer_alpha = pygame.surfarray.pixels_alpha(self.layer)
+            layer_alpha[~translucent[x:x + w, y:y + h]] = 0
+            del layer_alpha
+            self.layer_pos = (x, y)
+
+            # the surface is shared by all colliders with the same texture (see CompiledMap), so the
+            # translucent pixels are removed from a copy
+            self.surface = surface.copy()
+            alpha = pygame.surfarray.pixels_alpha(self.surface)
+            alpha[translucent] = 0
+            opaque = alpha.any()
+            del alpha
+            if not opaque:
+                self.surface = None
+
+        if self.surface is not None:
+            self.surface.set_alpha(255, pygame.RLEACCEL)
+            self.encode(self.surface, target)
+
+    @staticmethod
+    def encode(surface: pygame.Surface, target: pygame.Surface):
+        """SDL encodes the surface for the target it is blitted to, and again once it is blitted to another one"""
+        color = target.get_at((0, 0))
+        target.blit(surface, (0, 0), (0, 0, 1, 1))
+        target.set_at((0, 0), color)
+
+    def draw(self, target: pygame.Surface, x: float, y: float):
+        # truncated the same as pygame does with the position of a blit, before the layer is offset
+        x, y = int(x), int(y)
+        if self.surface is not None:
+            target.blit(self.surface, (x, y))
+        if self.layer is not None:
+            target.blit(self.layer, (x + self.layer_pos[0], y + self.layer_pos[1]))
@@ -0,0 +1,76 @@
+import pygame
+from collections import OrderedDict
+
+
+class RotationCache:
+    """Rotated sprites, e.g. the frames of the player along the slope of a ramp.
+
+    The angles are rounded to steps of angle_step degrees, so the few slopes of a map only produce a few
+    rotations of each frame. Frames are cached by a key (e.g. animation, frame and direction) and angle.
+    The least recently used rotations are evicted once they take more than max_bytes."""
+
+    def __init__(self, angle_step: float = 0.5, max_bytes: int = 32 * 1024 * 1024):
+        self.angle_step = angle_step
+        self.max_bytes = max_bytes
+        self.surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_size(surface: pygame.Surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def quantize(self, angle: float):
+        return round(angle / self.angle_step) * self.angle_step
+
+    def get(self, sprite: pygame.Surface, angle: float, key=None):
+        """Returns the sprite rotated by the angle (in degrees, rounded to the angle step). The key identifies
+        the sprite, it defaults to the surface itself."""
+        angle = self.quantize(angle)
+        cache_key = (sprite if key is None else key, angle)
+        surface = self.surfaces.get(cache_key, None)
+        if surface is not None:
+            self.surfaces.move_to_end(cache_key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = pygame.transform.rotate(sprite, angle)
+        self.surfaces[cache_key] = surface
+        self.bytes += self.get_size(surface)
+        self.evict()
+        return surface
+
+    def prewarm(self, sprites: list[tuple], angles: list[float]):
+        """Rotates the (key, sprite) pairs by all angles, as long as they fit into max_bytes"""
+        for angle in sorted({self.quantize(angle) for angle in angles}):
+            for key, sprite in sprites:
+                if (key, angle) in self.surfaces:
+                    continue
+                surface = pygame.transform.rotate(sprite, angle)
+                if self.bytes + self.get_size(surface) > self.max_bytes:
+                    return
+                self.surfaces[(key, angle)] = surface
+                self.bytes += self.get_size(surface)
+
+    def evict(self):
+        """Drops the least recently used rotations until the cache fits into max_bytes"""
+        while self.bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, surface = self.surfaces.popitem(last=False)
+            self.bytes -= self.get_size(surface)
+            self.evictions += 1
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes = 0
+
+    def get_stats(self):
+        return {
+            'surfaces': len(self.surfaces),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -2,6 +2,7 @@ import pygame
 from abc import ABC, abstractmethod
 from typing import final
 
+from src import config
 from src.Input import Input
 from src.Settings import Settings
 
@@ -18,6 +19,8 @@ class GameScene(ABC):
         self.keyboard = self.settings.mapping.get('keyboard', {})
         self.controller = self.settings.mapping.get('controller', {})
         self.controllers: list[pygame.joystick.Joystick] = []
+        if config.headless:
+            return
         pygame.joystick.init()
         for i in range(0, pygame.joystick.get_count()):
             controller = pygame.joystick.Joystick(i)
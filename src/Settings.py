@@ -18,16 +18,7 @@ class Settings:
         self.launch_on_ramp_jump = True
         self.new_plasma = False
 
-        self.game_sounds = [
-            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'player', 'jump_1.ogg')),
-            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'player', 'jump_2.ogg')),
-            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'player', 'wj_1.ogg')),
-            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'player', 'wj_2.ogg')),
-            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'player', 'death.ogg')),
-            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'items', 'pickup.ogg')),
-            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'items', 'rocket.ogg')),
-            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'items', 'empty_shot.mp3')),
-        ]
+        self.game_sounds = None
 
         self.settings_file = self.get_settings_file()
         self.mapping = DEFAULT_INPUT
@@ -51,7 +42,21 @@ class Settings:
     def get_volume(self):
         return self.volume / self.max_volume
 
+    def load_game_sounds(self):
+        self.game_sounds = [
+            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'player', 'jump_1.ogg')),
+            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'player', 'jump_2.ogg')),
+            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'player', 'wj_1.ogg')),
+            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'player', 'wj_2.ogg')),
+            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'player', 'death.ogg')),
+            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'items', 'pickup.ogg')),
+            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'items', 'rocket.ogg')),
+            pygame.mixer.Sound(os.path.join(config.assets_folder, 'sounds', 'items', 'empty_shot.mp3')),
+        ]
+
     def play_game_sound(self):
+        if self.game_sounds is None:
+            self.load_game_sounds()
         sound = self.game_sounds[random.randint(0, len(self.game_sounds) - 1)]
         sound.set_volume(self.get_volume())
         sound.play()
@@ -143,11 +148,12 @@ class Settings:
         if isinstance(music_enabled, bool):
             self.music_enabled = music_enabled
 
-        window = Window.from_display_module()
-        position = data.get('window', {}).get('position', {'x': 0, 'y': 0})
-        window.position = (position.get('x', 0), position.get('y', 0))
+        if not config.headless:
+            window = Window.from_display_module()
+            position = data.get('window', {}).get('position', {'x': 0, 'y': 0})
+            window.position = (position.get('x', 0), position.get('y', 0))
 
-        pygame.mixer.music.set_volume(self.music_volume / (self.max_volume / self.volume))
+            pygame.mixer.music.set_volume(self.music_volume / (self.max_volume / self.volume))
 
         mapping = data.get('mapping', {})
         controller = mapping.get('controller', {})
@@ -159,6 +165,8 @@ class Settings:
             self.mapping['keyboard'][input] = keyboard[input]
 
     def save(self):
+        if config.headless:
+            return
 
         window = Window.from_display_module()
         x, y = window.position
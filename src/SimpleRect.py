@@ -1,6 +1,8 @@
 
 
 class SimpleRect:
+    __slots__ = ('pos', 'w', 'h')
+
     def __init__(self, pos, width, height):
         self.pos = pos
         self.w = width
@@ -0,0 +1,78 @@
+import yaml
+
+from src import config
+from src.Game import Game
+from src.Input import Input
+from src.Replay import Replay
+from src.Settings import Settings
+
+
+class Simulation:
+    """Runs the game logic (Game.update -> Player.update -> Map.update) without a display, audio or rendering,
+    driven by a scripted input stream instead of pygame events"""
+
+    def __init__(self, map_name: str, settings: Settings, replay: Replay = None):
+        # must be set before any assets are loaded, so the game only keeps the collision geometry
+        config.headless = True
+        config.ticks = 0
+
+        if replay is not None:
+            replay.apply_settings(settings)
+            map_name = replay.map_name
+
+        self.map_name = map_name
+        self.replay = replay
+        self.game = Game(map_name, None, None, settings, replay)
+
+    @staticmethod
+    def load_inputs(inputs_file: str):
+        """Loads a list of scripted inputs like `{tick: 120, input: jump, pressed: true}` from a yaml file"""
+        with open(inputs_file, 'r') as file:
+            return yaml.safe_load(file) or []
+
+    def input(self, action: str, pressed: bool):
+        if action not in Input.PLAYER_ACTIONS:
+            raise Exception(f'Invalid input for simulation: {action}')
+
+        self.game.player_input(action, pressed)
+
+    def step(self):
+        self.game.step()
+
+    def is_finished(self):
+        return self.game.map.timer_stop is not None
+
+    def run(self, inputs: list[dict] = None, max_ticks: int = 100000):
+        events = sorted(inputs or [], key=lambda event: event['tick'])
+        next_event = 0
+
+        while self.game.tick < max_ticks and not self.is_finished():
+            if self.replay is not None and self.replay.is_finished(self.game):
+                break
+            while next_event < len(events) and events[next_event]['tick'] <= self.game.tick:
+                self.input(events[next_event]['input'], events[next_event]['pressed'])
+                next_event += 1
+            self.step()
+
+        if self.game.recorder is not None:
+            self.game.recorder.close(self.game.tick)
+
+        return self.get_result()
+
+    def get_result(self):
+        player = self.game.player
+        return {
+            'map': self.map_name,
+            'scale': self.game.settings.get_scale(),
+            'ticks': self.game.tick,
+            'game_time': config.ticks,
+            'finished': self.is_finished(),
+            'race_time': self.game.map.timer,
+            'player': {
+                'x': player.pos.x,
+                'y': player.pos.y,
+                'vel_x': player.vel.x,
+                'vel_y': player.vel.y,
+                'state': player.current_action_state,
+            },
+        }
@@ -0,0 +1,15 @@
+from abc import abstractmethod, ABC
+
+
+class SpatialIndex(ABC):
+    """Finds the map objects intersecting an area. Bounding boxes are (min_x, min_y, max_x, max_y)
+    and intersect when they touch, like in pyqtree."""
+
+    @abstractmethod
+    def insert(self, item, bbox: tuple):
+        pass
+
+    @abstractmethod
+    def intersect(self, bbox: tuple) -> list:
+        """Returns each item intersecting the bbox once, in an order which only depends on the index and the bbox"""
+        pass
@@ -0,0 +1,16 @@
+from pyqtree import Index as QuadTree
+
+from src.SpatialIndex import SpatialIndex
+
+
+class SpatialIndexQuadTree(SpatialIndex):
+    """Generic quadtree over the bbox of the map"""
+
+    def __init__(self, bbox: tuple):
+        self.tree = QuadTree(bbox=bbox)
+
+    def insert(self, item, bbox: tuple):
+        self.tree.insert(item, bbox)
+
+    def intersect(self, bbox: tuple):
+        return self.tree.intersect(bbox)
@@ -0,0 +1,53 @@
+import bisect, math
+
+from src.SpatialIndex import SpatialIndex
+
+
+class SpatialIndexStrip(SpatialIndex):
+    """Index for maps which are long horizontal strips.
+
+    The map is cut into columns of a fixed width. Each item is added to all columns its bbox overlaps,
+    where the items are sorted by their top edge. A query only visits the columns it overlaps and stops
+    within a column at the first item below the query."""
+
+    def __init__(self, column_width: float):
+        self.column_width = column_width
+        # entries (bbox, item) of each column, sorted by the top of the bbox, and the tops for bisect
+        self.columns: dict[int, list[tuple]] = {}
+        self.column_tops: dict[int, list[float]] = {}
+        self.unsorted: set[int] = set()
+
+    def get_columns(self, min_x: float, max_x: float):
+        return range(math.floor(min_x / self.column_width), math.floor(max_x / self.column_width) + 1)
+
+    def insert(self, item, bbox: tuple):
+        for column in self.get_columns(bbox[0], bbox[2]):
+            self.columns.setdefault(column, []).append((bbox, item))
+            self.unsorted.add(column)
+
+    def sort(self):
+        for column in self.unsorted:
+            # stable, items with the same top stay in insertion order
+            entries = self.columns[column]
+            entries.sort(key=lambda entry: entry[0][1])
+            self.column_tops[column] = [entry[0][1] for entry in entries]
+        self.unsorted.clear()
+
+    def intersect(self, bbox: tuple):
+        if self.unsorted:
+            self.sort()
+
+        min_x, min_y, max_x, max_y = bbox
+        results = []
+        seen = set()
+        for column in self.get_columns(min_x, max_x):
+            entries = self.columns.get(column, None)
+            if entries is None:
+                continue
+
+            for i in range(bisect.bisect_right(self.column_tops[column], max_y)):
+                item_bbox, item = entries[i]
+                if item_bbox[3] >= min_y and item_bbox[2] >= min_x and item_bbox[0] <= max_x and id(item) not in seen:
+                    results.append(item)
+                    seen.add(id(item))
+        return results
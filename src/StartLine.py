@@ -1,6 +1,7 @@
 import os, pygame
 
 from src import config
+from src.Assets import assets
 from src.GameObject import GameObject
 from src.SimpleRect import SimpleRect
 from src.Vector2 import Vector2
@@ -8,21 +9,27 @@ from src.Vector2 import Vector2
 
 class StartLine(GameObject):
 
-    def __init__(self, pos: Vector2, sprite: pygame.Surface = None, scale: float = 1.0):
+    SPRITE = os.path.join('graphics', 'start.png')
+
+    def __init__(self, pos: Vector2, scale: float = 1.0):
         self.scale = scale
-        self.sprite = sprite if sprite is not None else pygame.image.load(os.path.join(config.assets_folder, 'graphics', 'start.png')).convert_alpha()
-        if scale != 1:
-            self.sprite = pygame.transform.scale(self.sprite, (self.sprite.get_width() * scale, self.sprite.get_height() * scale))
-        super().__init__(SimpleRect(pos, self.sprite.get_width(), self.sprite.get_height()))
+        # without a display only the size of the sprite is needed for the collision shape
+        width, height = assets.get_image_size(self.SPRITE, scale)
+        super().__init__(SimpleRect(pos, width, height))
+
+        # the parts of the sprite drawn behind and in front of the player
+        self.back = None
+        self.front = None
+        if not config.headless:
+            self.back = assets.get_region(self.SPRITE, scale, (0, 0, 10 * scale, 128 * scale))
+            self.front = assets.get_region(self.SPRITE, scale, (10 * scale, 0 * scale, 55 * scale, 128 * scale))
 
         self.bbox = (self.pos.x, self.pos.y, self.pos.x + self.shape.w, self.pos.y + self.shape.w)
 
     def draw_back(self, surface: pygame.Surface, camera):
-        view_pos = camera.to_view_space(self.pos)
-        back = self.sprite.subsurface((0, 0, 10 * self.scale, 128 * self.scale)).copy()
-        surface.blit(back, (view_pos.x, view_pos.y, 30, self.shape.h))
+        view_pos = camera.to_view_space(self.pos, camera.view_pos)
+        surface.blit(self.back, (view_pos.x, view_pos.y, 30, self.shape.h))
 
     def draw_front(self, surface: pygame.Surface, camera):
-        view_pos = camera.to_view_space(self.pos)
-        back = self.sprite.subsurface((10 * self.scale, 0 * self.scale, 55 * self.scale, 128 * self.scale)).copy()
-        surface.blit(back, (view_pos.x + 10 * self.scale, view_pos.y, 55 * self.scale, self.shape.h))
+        view_pos = camera.to_view_space(self.pos, camera.view_pos)
+        surface.blit(self.front, (view_pos.x + 10 * self.scale, view_pos.y, 55 * self.scale, self.shape.h))
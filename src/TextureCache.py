@@ -0,0 +1,84 @@
+import pygame
+from collections import OrderedDict
+
+
+class TextureCache:
+    """Process wide cache of decoded texture images and their scaled and rotated surfaces.
+
+    Textures with the same path, scale and rotation share their surfaces. The least recently used
+    entries are evicted once the cached surfaces take more than max_bytes (surfaces still held by a
+    texture stay alive, they are only not shared with new textures anymore)."""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.images: OrderedDict[str, pygame.Surface] = OrderedDict()
+        self.surfaces: OrderedDict[tuple, tuple[pygame.Surface, pygame.Surface]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_size(surface: pygame.Surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def get_image(self, path: str):
+        """Returns the decoded image, converted to the display format"""
+        image = self.images.get(path, None)
+        if image is not None:
+            self.images.move_to_end(path)
+            return image
+
+        image = pygame.image.load(path).convert_alpha()
+        self.images[path] = image
+        self.bytes += self.get_size(image)
+        return image
+
+    def get(self, path: str, scale: float, rotation: float):
+        """Returns the scaled surface and the scaled and rotated surface of an image"""
+        key = (path, scale, rotation)
+        surfaces = self.surfaces.get(key, None)
+        if surfaces is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surfaces
+
+        self.misses += 1
+        image = self.get_image(path)
+        scaled_surface = pygame.transform.scale(image, (image.get_width() * scale, image.get_height() * scale))
+        # rotated in the other direction, to match map designer app!
+        surface = pygame.transform.rotate(scaled_surface, -rotation)
+
+        surfaces = (scaled_surface, surface)
+        self.surfaces[key] = surfaces
+        self.bytes += self.get_size(scaled_surface) + self.get_size(surface)
+        self.evict()
+        return surfaces
+
+    def evict(self):
+        """Drops the least recently used surfaces, then images, until the cache fits into max_bytes.
+        The most recently used entries are kept, even if they are bigger than max_bytes on their own."""
+        while self.bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, (scaled_surface, surface) = self.surfaces.popitem(last=False)
+            self.bytes -= self.get_size(scaled_surface) + self.get_size(surface)
+            self.evictions += 1
+
+        while self.bytes > self.max_bytes and len(self.images) > 1:
+            _, image = self.images.popitem(last=False)
+            self.bytes -= self.get_size(image)
+            self.evictions += 1
+
+    def clear(self):
+        self.images.clear()
+        self.surfaces.clear()
+        self.bytes = 0
+
+    def get_stats(self):
+        return {
+            'images': len(self.images),
+            'surfaces': len(self.surfaces),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -1,17 +1,47 @@
 from src.Texture import Texture
 import pygame
 import math
+from typing import NamedTuple
 
 from src.Vector2 import Vector2
 
 
+class RampEdge(NamedTuple):
+    """A non-vertical edge of a triangle, as the player walks on it. Indexing it like a (p1, p2) tuple
+    still gives the two points in the order of the side."""
+    p1: Vector2
+    p2: Vector2
+    # the points from left to right
+    x_start: float
+    y_start: float
+    x_end: float
+    y_end: float
+    dx: float
+    dy: float
+    # angle of the ramp, positive when it goes down to the right
+    radians: float
+
+    @classmethod
+    def from_points(cls, p1: Vector2, p2: Vector2):
+        left, right = (p1, p2) if p1.x < p2.x else (p2, p1)
+        dx = right.x - left.x
+        dy = right.y - left.y
+        return cls(p1, p2, left.x, left.y, right.x, right.y, dx, dy, -math.atan2(dy, dx))
+
+
 class Triangle():
     """Triangle class for collider triangles (collides with rectangles)"""
-    def __init__(self, p1, p2, p3, texture: Texture|None=None):
+
+    __slots__ = ('p1', 'p2', 'p3', 'surface', 'rle_surface', 'surface_pos', 'bbox', 'edges', 'top_edges', 'texture')
+
+    def __init__(self, p1, p2, p3, texture: Texture|None=None, surface: pygame.Surface|None=None):
         self.p1 = p1
         self.p2 = p2
         self.p3 = p3
-        self.surface = None
+        # surface can be passed in already rendered (see CompiledMap)
+        self.surface = surface
+        # drawn instead of the surface if set (see RleSurface)
+        self.rle_surface = None
         self.surface_pos = None
 
         tri_min_x = float("inf")
@@ -29,6 +59,21 @@ class Triangle():
                 tri_max_y = point.y
         self.bbox = (tri_min_x, tri_min_y, tri_max_x, tri_max_y)
 
+        # the non-vertical edges in the order of the points
+        self.edges = tuple(RampEdge.from_points(a, b) for a, b in ((p1, p2), (p2, p3), (p3, p1)) if a.x != b.x)
+
+        # the non-vertical sides connected to the highest point (lowest y), which the player can stand on
+        if p1.y <= p2.y and p1.y <= p3.y:
+            top_sides = ((p1, p2), (p1, p3))
+        elif p2.y <= p3.y:
+            top_sides = ((p2, p1), (p2, p3))
+        else:
+            top_sides = ((p3, p1), (p3, p2))
+        self.top_edges = tuple(RampEdge.from_points(a, b) for a, b in top_sides if a.x != b.x)
+
+        if surface is not None:
+            self.surface_pos = Vector2(tri_min_x, tri_min_y)
+
         # pre-render surface if there is a texture
         if texture is not None:
             # Store the texture for reference
@@ -115,7 +160,9 @@ class Triangle():
             self.surface.blit(triangle_mask, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
 
     def draw(self, target_surface: pygame.Surface, camera):
-        if self.surface is not None:
+        if self.rle_surface is not None:
+            self.rle_surface.draw(target_surface, self.surface_pos.x - camera.pos.x, self.surface_pos.y - camera.pos.y)
+        elif self.surface is not None:
             target_surface.blit(self.surface, (self.surface_pos.x - camera.pos.x, self.surface_pos.y - camera.pos.y))
         else:
             pygame.draw.polygon(target_surface, (160, 0, 44, 128), [
@@ -153,6 +200,30 @@ class Triangle():
         b3 = sign(pt, self.p3, self.p1) < 0.0
         return ((b1 == b2) and (b2 == b3))
 
+    def get_ray_entry(self, x1: float, y1: float, x2: float, y2: float):
+        """Returns the fraction (0 to 1) of the segment from (x1, y1) to (x2, y2) at which it enters this
+        triangle, or None if it doesn't"""
+        if self.point_in_triangle(Vector2(x1, y1)):
+            return 0.0
+
+        dx = x2 - x1
+        dy = y2 - y1
+        t_enter = None
+        for p1, p2 in ((self.p1, self.p2), (self.p2, self.p3), (self.p3, self.p1)):
+            edge_x = p2.x - p1.x
+            edge_y = p2.y - p1.y
+            det = dx * edge_y - dy * edge_x
+            # parallel to the edge
+            if det == 0:
+                continue
+
+            t = ((p1.x - x1) * edge_y - (p1.y - y1) * edge_x) / det
+            u = ((p1.x - x1) * dy - (p1.y - y1) * dx) / det
+            if 0 <= t <= 1 and 0 <= u <= 1 and (t_enter is None or t < t_enter):
+                t_enter = t
+
+        return t_enter
+
     def check_collisions(self, collider_list):
         """Return first collider whose rectangle overlaps this triangle."""
         for collider in collider_list:
@@ -1,10 +1,18 @@
 class Vector2():
     """Vector class for 2D positions and velocities"""
 
+    __slots__ = ('x', 'y')
+
     def __init__(self, x=0, y=0):
         self.x = x
         self.y = y
 
+    def set(self, x, y):
+        """Sets both components in place, returns the vector to allow reusing it as a buffer"""
+        self.x = x
+        self.y = y
+        return self
+
     def __mul__(self, other):
         """Overload multiplication"""
         return Vector2(self.x * other, self.y * other)
@@ -15,4 +23,22 @@ class Vector2():
 
     def __sub__(self, other):
         """Overload Addition"""
-        return Vector2(self.x - other.x, self.y - other.y)
\ No newline at end of file
+        return Vector2(self.x - other.x, self.y - other.y)
+
+    def __imul__(self, other):
+        """In place multiplication, doesn't allocate a new vector"""
+        self.x *= other
+        self.y *= other
+        return self
+
+    def __iadd__(self, other):
+        """In place addition, doesn't allocate a new vector"""
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def __isub__(self, other):
+        """In place subtraction, doesn't allocate a new vector"""
+        self.x -= other.x
+        self.y -= other.y
+        return self
@@ -4,6 +4,13 @@ assets_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets
 
 FPS = 120
 
+#Physics run in fixed steps of this many ms, independent of the render frame rate
+PHYSICS_TICK = 4
+#Longest frame that is caught up with physics steps, avoids a spiral of death after stalls
+MAX_FRAME_TIME = 250
+#Replays store a full state snapshot every this many physics ticks, so they can be seeked
+REPLAY_KEYFRAME_INTERVAL = 2500
+
 #Shared variables
 screen = None
 surface = None
@@ -13,6 +20,15 @@ mods = None
 delta_time = None
 final_count_down = False
 
+#Game time in ms, advanced by the game loop (or the simulation) instead of the wall clock
+ticks = 0
+
+#Run without a display and audio, skipping all asset rasterization (see Simulation)
+headless = False
+
+#Draw the collider surfaces RLE accelerated (see RleSurface), which takes longer to load a map
+rle_surfaces = True
+
 #Colors for map loading
 BLACK = (0, 0, 0, 255)
 BLUE = (0, 0, 255, 255)
@@ -1,22 +1,36 @@
 import pygame as pg
 from os import path
 
-pg.init()
-#initialize mixer
-pg.mixer.pre_init(44100, 16, 2, 4096)
-
 sounds_folder = path.join(path.dirname(path.dirname(__file__)), 'assets', 'sounds')
 
-#Load all sounds
-walljump1 = pg.mixer.Sound(path.join(sounds_folder, 'player', 'wj_1.ogg'))
-walljump2 = pg.mixer.Sound(path.join(sounds_folder, 'player', 'wj_2.ogg'))
-jump1 = pg.mixer.Sound(path.join(sounds_folder, 'player', 'jump_1.ogg'))
-jump2 = pg.mixer.Sound(path.join(sounds_folder, 'player', 'jump_2.ogg'))
-death = pg.mixer.Sound(path.join(sounds_folder, 'player', 'death.ogg'))
-plasma = pg.mixer.Sound(path.join(sounds_folder, 'items', 'plasma.ogg'))
-rocket = pg.mixer.Sound(path.join(sounds_folder, 'items', 'rocket.ogg'))
-rocket_fly = pg.mixer.Sound(path.join(sounds_folder, 'items', 'rocket_fly.mp3'))
-rocket_launch = pg.mixer.Sound(path.join(sounds_folder, 'items', 'rocket_launch.mp3'))
-pickup = pg.mixer.Sound(path.join(sounds_folder, 'items', 'pickup.ogg'))
-weapon_empty = pg.mixer.Sound(path.join(sounds_folder, 'items', 'empty_shot.mp3'))
-weapon_empty.set_volume(0.6)
+class NullSound:
+    """Stand-in for pygame.mixer.Sound when running without audio"""
+    def play(self, *args, **kwargs):
+        return None
+
+    def stop(self):
+        pass
+
+    def set_volume(self, *args):
+        pass
+
+#Silent until load() is called, so importing this module does not require an initialized mixer
+walljump1 = walljump2 = jump1 = jump2 = death = NullSound()
+plasma = rocket = rocket_fly = rocket_launch = pickup = weapon_empty = NullSound()
+
+def load():
+    """Load all sounds, requires pygame.mixer to be initialized"""
+    global walljump1, walljump2, jump1, jump2, death, plasma, rocket, rocket_fly, rocket_launch, pickup, weapon_empty
+
+    walljump1 = pg.mixer.Sound(path.join(sounds_folder, 'player', 'wj_1.ogg'))
+    walljump2 = pg.mixer.Sound(path.join(sounds_folder, 'player', 'wj_2.ogg'))
+    jump1 = pg.mixer.Sound(path.join(sounds_folder, 'player', 'jump_1.ogg'))
+    jump2 = pg.mixer.Sound(path.join(sounds_folder, 'player', 'jump_2.ogg'))
+    death = pg.mixer.Sound(path.join(sounds_folder, 'player', 'death.ogg'))
+    plasma = pg.mixer.Sound(path.join(sounds_folder, 'items', 'plasma.ogg'))
+    rocket = pg.mixer.Sound(path.join(sounds_folder, 'items', 'rocket.ogg'))
+    rocket_fly = pg.mixer.Sound(path.join(sounds_folder, 'items', 'rocket_fly.mp3'))
+    rocket_launch = pg.mixer.Sound(path.join(sounds_folder, 'items', 'rocket_launch.mp3'))
+    pickup = pg.mixer.Sound(path.join(sounds_folder, 'items', 'pickup.ogg'))
+    weapon_empty = pg.mixer.Sound(path.join(sounds_folder, 'items', 'empty_shot.mp3'))
+    weapon_empty.set_volume(0.6)
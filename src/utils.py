@@ -1,5 +1,6 @@
-import math, os, pygame, sys
+import math, os, pygame, sys, tempfile
 from datetime import date
+from pathlib import Path
 
 def color_gradient(value, min_value, max_value):
     """Returns (R, G, B) color from red (min) → yellow (mid) → green (max).
@@ -54,6 +55,20 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
+def get_user_folder(*subfolders):
+    """Returns a writable folder for user data (next to the settings file), creating it if needed.
+    Falls back to the temp directory if the home directory is not writable."""
+    for dir in [Path.home(), Path(tempfile.gettempdir())]:
+        folder = dir.joinpath('.racesow_arcade', *subfolders)
+        try:
+            folder.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            continue
+        if os.access(folder, os.W_OK):
+            return str(folder)
+
+    return os.path.abspath('.')
+
 def get_distance(p1, p2):
     """Calculates the Euclidean distance between two tuples."""
     x1, y1 = p1
@@ -91,3 +106,22 @@ def ease_in_out_cubic(t: float) -> float:
     if t < 0.5:
         return 4 * t * t * t
     return 1 - pow(-2 * t + 2, 3) / 2
+
+def get_attributes(obj) -> dict:
+    """Like vars(), but also returns the attributes stored in __slots__"""
+    attributes = {}
+    for cls in reversed(type(obj).__mro__):
+        for key in cls.__dict__.get('__slots__', ()):
+            if hasattr(obj, key):
+                attributes[key] = getattr(obj, key)
+    attributes.update(getattr(obj, '__dict__', {}))
+    return attributes
+
+def get_plain_values(obj, exclude: tuple = ()) -> dict:
+    """Returns all attributes of an object that hold plain values (bool, int, float, str or None),
+    used to snapshot game state e.g. for replay keyframes."""
+    return {key: value for key, value in get_attributes(obj).items() if key not in exclude and (value is None or isinstance(value, (bool, int, float, str)))}
+
+def set_plain_values(obj, values: dict):
+    for key, value in values.items():
+        setattr(obj, key, value)